@@ -0,0 +1,121 @@
+#Benchmark: id-keyed ToDoList vs the old list-based one on a mix of add/remove/complete operations,
+#plus memory used per task by each representation
+
+import random
+import sys
+import time
+import tracemalloc
+
+from todo_day_1 import ToDoList
+
+
+class Task:
+    #the original Task, a plain object with a per-instance __dict__
+    def __init__(self, description):
+        self.description = description
+        self.completed = False
+
+    def mark_completed(self):
+        self.completed = True
+
+
+class ListToDoList:
+    #the original list-based implementation, addressed by position
+    def __init__(self):
+        self.tasks = []
+
+    def add_task(self, description):
+        self.tasks.append(Task(description))
+
+    def remove_task(self, index):
+        if 0 <= index < len(self.tasks):
+            del self.tasks[index]
+
+    def mark_task_complete(self, index):
+        if 0 <= index < len(self.tasks):
+            self.tasks[index].mark_completed()
+
+
+def make_operations(count, initial_tasks, seed=42):
+    #50% adds, 25% removes, 25% completes, each remove/complete hits a random live task
+    rng = random.Random(seed)
+    ops = []
+    live_ids = list(range(1, initial_tasks + 1))
+    next_id = initial_tasks + 1
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.5 or not live_ids:
+            ops.append(('add', next_id, 0.0))
+            live_ids.append(next_id)
+            next_id += 1
+            continue
+        position = rng.random()
+        slot = int(position * len(live_ids))
+        task_id = live_ids[slot]
+        if roll < 0.75:
+            ops.append(('remove', task_id, position))
+            live_ids[slot] = live_ids[-1]
+            live_ids.pop()
+        else:
+            ops.append(('complete', task_id, position))
+    return ops
+
+
+def run_list(ops, initial_tasks):
+    todo = ListToDoList()
+    for i in range(initial_tasks):
+        todo.add_task(f"task {i}")
+    start = time.perf_counter()
+    for op, _, position in ops:
+        if op == 'add':
+            todo.add_task("new task")
+        elif op == 'remove':
+            todo.remove_task(int(position * len(todo.tasks)))
+        else:
+            todo.mark_task_complete(int(position * len(todo.tasks)))
+    return time.perf_counter() - start
+
+
+def run_indexed(ops, initial_tasks):
+    todo = ToDoList()
+    for i in range(initial_tasks):
+        todo.add_task(f"task {i}")
+    start = time.perf_counter()
+    for op, task_id, _ in ops:
+        if op == 'add':
+            todo.add_task("new task")
+        elif op == 'remove':
+            todo.remove_task(task_id)
+        else:
+            todo.mark_task_complete(task_id)
+    return time.perf_counter() - start
+
+
+def bytes_per_task(make_todo, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    todo = make_todo()
+    for i in range(count):
+        todo.add_task(f"Imported task number {i}")
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / count
+
+
+if __name__ == "__main__":
+    OPERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    INITIAL_TASKS = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+
+    ops = make_operations(OPERATIONS, INITIAL_TASKS)
+    print(f"{OPERATIONS} mixed operations on {INITIAL_TASKS} starting tasks")
+
+    list_time = run_list(ops, INITIAL_TASKS)
+    print(f"List-based ToDoList: {list_time:.2f} seconds ({OPERATIONS / list_time:,.0f} ops/sec)")
+
+    indexed_time = run_indexed(ops, INITIAL_TASKS)
+    print(f"Id-keyed ToDoList:   {indexed_time:.2f} seconds ({OPERATIONS / indexed_time:,.0f} ops/sec)")
+
+    MEMORY_TASKS = 200_000
+    print(f"\nMemory for {MEMORY_TASKS} tasks")
+    print(f"List of Task objects: {bytes_per_task(ListToDoList, MEMORY_TASKS):.1f} bytes/task")
+    print(f"Columnar TaskStore:   {bytes_per_task(ToDoList, MEMORY_TASKS):.1f} bytes/task")
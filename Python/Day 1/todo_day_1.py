@@ -1,7 +1,15 @@
 #Todo app 
 
+import os
+import re
+from array import array
+from bisect import bisect_left, insort
+
 class Task:
-    def __init__(self, description):
+    __slots__ = ('task_id', 'description', 'completed')
+
+    def __init__(self, description, task_id=None):
+        self.task_id = task_id
         self.description = description
         self.completed = False
         
@@ -13,41 +21,355 @@ class Task:
         return f"{status} {self.description}"
     
 
+class TaskStore:
+    #columnar task storage: one row per task, no per-task Python objects
+    #descriptions are utf-8 bytes in one shared buffer, completion flags are bits
+    def __init__(self):
+        self.ids = array('q')          #task id per row, 0 once the row is removed
+        self.offsets = array('q')      #start of each row's description in text
+        self.text = bytearray()
+        self.completed_bits = bytearray()
+        self.row_of = array('q')       #task id -> row, -1 if there is no such task
+        self.live = 0
+
+    def __len__(self):
+        return self.live
+
+    def __contains__(self, task_id):
+        return self._row(task_id) >= 0
+
+    def add(self, task_id, description):
+        row = len(self.ids)
+        self.ids.append(task_id)
+        self.offsets.append(len(self.text))
+        self.text += description.encode('utf-8')
+        if row % 8 == 0:
+            self.completed_bits.append(0)
+        if task_id >= len(self.row_of):
+            self.row_of.extend([-1] * (task_id + 1 - len(self.row_of)))
+        self.row_of[task_id] = row
+        self.live += 1
+
+    def remove(self, task_id):
+        row = self.row_of[task_id]
+        self.ids[row] = 0
+        self.row_of[task_id] = -1
+        self.live -= 1
+        #rows are only tombstoned, squeeze them out once they outnumber the live ones
+        removed = len(self.ids) - self.live
+        if removed > 1024 and removed > self.live:
+            self.compact()
+
+    def complete(self, task_id):
+        row = self.row_of[task_id]
+        self.completed_bits[row >> 3] |= 1 << (row & 7)
+
+    def get(self, task_id):
+        row = self._row(task_id)
+        if row < 0:
+            return None
+        #a detached copy, changes have to go through ToDoList
+        task = Task(self._description(row), task_id)
+        task.completed = self._is_completed(row)
+        return task
+
+    def description(self, task_id):
+        return self._description(self.row_of[task_id])
+
+    def rows(self):
+        #(task id, description, completed) in display order
+        ids = self.ids
+        for row in range(len(ids)):
+            if ids[row]:
+                yield ids[row], self._description(row), self._is_completed(row)
+
+    def compact(self):
+        old = list(self.rows())
+        self.ids = array('q')
+        self.offsets = array('q')
+        self.text = bytearray()
+        self.completed_bits = bytearray()
+        self.live = 0
+        for task_id, description, completed in old:
+            self.add(task_id, description)
+            if completed:
+                self.complete(task_id)
+
+    def _row(self, task_id):
+        if 0 < task_id < len(self.row_of):
+            return self.row_of[task_id]
+        return -1
+
+    def _description(self, row):
+        end = self.offsets[row + 1] if row + 1 < len(self.offsets) else len(self.text)
+        return self.text[self.offsets[row]:end].decode('utf-8')
+
+    def _is_completed(self, row):
+        return bool(self.completed_bits[row >> 3] & (1 << (row & 7)))
+
+
+class SearchIndex:
+    #inverted index: lower-cased word -> ids of the tasks containing it
+    #words are also kept sorted so prefix queries are a bisect instead of a scan
+    def __init__(self):
+        self.postings = {}
+        self.terms = []
+
+    @staticmethod
+    def tokenize(text):
+        return set(re.findall(r'\w+', text.lower()))
+
+    def add(self, task_id, description):
+        for term in self.tokenize(description):
+            ids = self.postings.get(term)
+            if ids is None:
+                ids = self.postings[term] = set()
+                insort(self.terms, term)
+            ids.add(task_id)
+
+    def remove(self, task_id, description):
+        for term in self.tokenize(description):
+            ids = self.postings[term]
+            ids.discard(task_id)
+            if not ids:
+                del self.postings[term]
+                del self.terms[bisect_left(self.terms, term)]
+
+    def lookup(self, term):
+        return self.postings.get(term, set())
+
+    def prefix_terms(self, prefix):
+        start = bisect_left(self.terms, prefix)
+        end = start
+        while end < len(self.terms) and self.terms[end].startswith(prefix):
+            end += 1
+        return self.terms[start:end]
+
+    def search(self, query, descriptions=None):
+        #every word has to match (AND), a trailing * turns a word into a prefix
+        #descriptions maps task id -> description and lets prefix words be checked per candidate
+        words = query.lower().split()
+        if not words:
+            return []
+        #(prefix, posting sets): a task matches a clause if it is in any of its sets
+        clauses = []
+        for word in words:
+            if word.endswith('*'):
+                prefix = word[:-1]
+                clauses.append((prefix, [self.postings[term] for term in self.prefix_terms(prefix)]))
+            else:
+                clauses.extend((None, [self.lookup(term)]) for term in self.tokenize(word))
+        #a query of punctuation only has no words to match
+        if not clauses:
+            return []
+        #start from the rarest clause, then only probe the few surviving candidates
+        clauses.sort(key=lambda clause: sum(len(ids) for ids in clause[1]))
+        matches = set().union(*clauses[0][1])
+        for prefix, sets in clauses[1:]:
+            if not matches:
+                break
+            if len(sets) == 1:
+                matches &= sets[0]
+                continue
+            #rough costs in set lookups: merge the whole clause, probe every set, or re-read descriptions
+            union_cost = sum(len(ids) for ids in sets)
+            probe_cost = len(matches) * len(sets)
+            describe_cost = len(matches) * 15 if descriptions is not None else probe_cost
+            if union_cost <= min(probe_cost, describe_cost):
+                matches &= set().union(*sets)
+            elif describe_cost < probe_cost:
+                word_start = re.compile(r'(?<!\w)' + re.escape(prefix))
+                matches = {task_id for task_id in matches
+                           if word_start.search(descriptions(task_id).lower())}
+            else:
+                matches = {task_id for task_id in matches if any(task_id in ids for ids in sets)}
+        return sorted(matches)
+
+
 class ToDoList:
+    #number of journal records after which the journal is folded into the snapshot
+    compact_threshold = 10000
+    #first line of a snapshot that stores task ids, older files are just "description,completed" lines
+    snapshot_header = '#todo v2'
+    #every save starts a new generation of the journal; the snapshot names the generation to replay
+    #on top of it and the journal's first line names its own, so a journal the snapshot already holds is skipped
+    journal_header = 'G'
+
     def __init__(self):
-        self.tasks = []
+        #rows are kept in insertion order, which is also the display order
+        self.tasks = TaskStore()
+        self.index = SearchIndex()
+        self.next_id = 1
+        self.filename = None
+        self.journal = None
+        self.journal_records = 0
+        self.generation = 0
     
     def add_task(self, description):
-        self.tasks.append(Task(description))
+        #tasks are stored one per line, so line breaks become spaces once, here, for memory, journal and snapshot alike
+        description = re.sub(r'\r\n|[\r\n]', ' ', description)
+        task_id = self.next_id
+        self._add(task_id, description)
+        self._log(f"A,{task_id},{description}")
+        return task_id
         
-    def remove_task(self, index):
-        if 0 <= index < len(self.tasks):
-            del self.tasks[index]
+    def remove_task(self, task_id):
+        if task_id in self.tasks:
+            self._remove(task_id)
+            self._log(f"R,{task_id}")
     
-    def mark_task_complete(self, index):
-        if 0 <= index < len(self.tasks):
-            self.tasks[index].mark_completed()
+    def mark_task_complete(self, task_id):
+        if task_id in self.tasks:
+            self._complete(task_id)
+            self._log(f"C,{task_id}")
+
+    def get_task(self, task_id):
+        return self.tasks.get(task_id)
+
+    def search(self, query):
+        #ids of matching tasks in display order
+        return self.index.search(query, self.tasks.description)
             
     def view_tasks(self):
-        for i, task in enumerate(self.tasks, start=1):
-            print(f"\n{i}. {task}")
+        for task_id, description, completed in self.tasks.rows():
+            status = '[X]' if completed else '[]'
+            print(f"\n{task_id}. {status} {description}")
     
     def save_tasks(self, filename):
-        with open(filename, 'w') as file:
-            for task in self.tasks:
-                file.write(f"{task.description},{task.completed}\n")
+        #write the snapshot next to the old one and swap it in, so a crash never leaves half a file
+        own_file = filename == self.filename
+        generation = self.generation + 1 if own_file else self.generation
+        temp_filename = filename + '.tmp'
+        with open(temp_filename, 'w') as file:
+            file.write(f"{self.snapshot_header},{self.next_id},{generation}\n")
+            for task_id, description, completed in self.tasks.rows():
+                file.write(f"{task_id},{description},{completed}\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, filename)
+
+        #everything in the journal is now part of the snapshot, the old journal is of an earlier
+        #generation from here on, so a crash before it is replaced never replays it again
+        if own_file:
+            self.generation = generation
+            self._reset_journal()
     
     def load_tasks(self, filename):
+        self.filename = filename
         try:
             with open(filename, 'r') as file:
-                for line in file:
-                    description, completed = line.strip().split(',')
-                    task = Task(description)
-                    if completed == 'True':
-                        task.mark_completed()
-                    self.tasks.append(task)
+                first_line = file.readline()
+                if first_line.startswith(self.snapshot_header):
+                    #snapshots written before journal generations have no generation field
+                    header = first_line.rstrip('\n').split(',')
+                    self.next_id = int(header[1])
+                    self.generation = int(header[2]) if len(header) > 2 else 0
+                    for line in file:
+                        task_id, rest = line.rstrip('\n').split(',', 1)
+                        description, completed = rest.rsplit(',', 1)
+                        self._load_task(int(task_id), description, completed)
+                else:
+                    #old format without ids, number the tasks in file order
+                    if first_line:
+                        self._load_legacy_line(first_line)
+                    for line in file:
+                        self._load_legacy_line(line)
         except FileNotFoundError:
             pass
+
+        valid_bytes = self._replay_journal()
+        if valid_bytes is None:
+            self._reset_journal()
+        else:
+            #drop a torn last line left by a crash, or the next record would be glued onto it
+            os.truncate(self.journal_filename(), valid_bytes)
+            self.journal = open(self.journal_filename(), 'a', encoding='utf-8')
+
+    def close(self):
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+
+    def journal_filename(self):
+        return self.filename + '.journal'
+
+    def _load_task(self, task_id, description, completed):
+        self._add(task_id, description)
+        if completed == 'True':
+            self._complete(task_id)
+
+    def _load_legacy_line(self, line):
+        description, completed = line.rstrip('\n').rsplit(',', 1)
+        self._load_task(self.next_id, description, completed)
+
+    def _add(self, task_id, description):
+        if task_id in self.tasks:
+            return
+        self.tasks.add(task_id, description)
+        self.index.add(task_id, description)
+        self.next_id = max(self.next_id, task_id + 1)
+
+    def _remove(self, task_id):
+        self.index.remove(task_id, self.tasks.description(task_id))
+        self.tasks.remove(task_id)
+
+    def _complete(self, task_id):
+        self.tasks.complete(task_id)
+
+    def _log(self, record):
+        if not self.journal:
+            return
+        #one line per mutation, flushed straight away so a crash loses at most this record
+        self.journal.write(record + '\n')
+        self.journal.flush()
+        self.journal_records += 1
+        if self.journal_records >= self.compact_threshold:
+            self.save_tasks(self.filename)
+
+    def _replay_journal(self):
+        #length of the journal up to its last complete line, or None if there is no journal to keep
+        #appending to: none yet, or one the snapshot already holds
+        valid_bytes = 0
+        try:
+            with open(self.journal_filename(), 'rb') as file:
+                for raw_line in file:
+                    #a torn last line from a crash has no newline, skip it
+                    if not raw_line.endswith(b'\n'):
+                        break
+                    valid_bytes += len(raw_line)
+                    op, value = raw_line.decode('utf-8').rstrip('\n').split(',', 1)
+                    if op == self.journal_header:
+                        if int(value) < self.generation:
+                            return None
+                        if int(value) > self.generation:
+                            raise ValueError(f"{self.journal_filename()} continues a newer snapshot than {self.filename}")
+                        continue
+                    if op == 'A':
+                        task_id, description = value.split(',', 1)
+                        self._add(int(task_id), description)
+                    elif op == 'R':
+                        if int(value) in self.tasks:
+                            self._remove(int(value))
+                    elif op == 'C':
+                        if int(value) in self.tasks:
+                            self._complete(int(value))
+                    self.journal_records += 1
+        except FileNotFoundError:
+            return None
+        return valid_bytes
+
+    def _reset_journal(self):
+        #an empty journal of the current generation, swapped in whole so it is never seen without its header
+        if self.journal:
+            self.journal.close()
+        temp_filename = self.journal_filename() + '.tmp'
+        with open(temp_filename, 'w', encoding='utf-8') as file:
+            file.write(f"{self.journal_header},{self.generation}\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, self.journal_filename())
+        self.journal = open(self.journal_filename(), 'a', encoding='utf-8')
+        self.journal_records = 0
         
 
 def main():
@@ -55,27 +377,32 @@ def main():
     todo_list.load_tasks('tasks.txt')
 
     while True:
-        print("\nChoose an option for operation : \n 1. Add Task\n 2. Remove Task\n 3. View Tasks\n 4. Mark Task as Complete\n 5. Save & Exit")
+        print("\nChoose an option for operation : \n 1. Add Task\n 2. Remove Task\n 3. View Tasks\n 4. Mark Task as Complete\n 5. Save & Exit\n 6. Search Tasks")
         choice = input("Choose an option: ")
 
         if choice == '1':
             description = input("Enter task description: ")
             todo_list.add_task(description)
         elif choice == '2':
-            index = int(input("Enter task number to remove: ")) - 1
-            todo_list.remove_task(index)
+            task_id = int(input("Enter task number to remove: "))
+            todo_list.remove_task(task_id)
         elif choice == '3':
             todo_list.view_tasks()
         elif choice == '4':
-            index = int(input("Enter task number to mark as complete: ")) - 1
-            todo_list.mark_task_complete(index)
+            task_id = int(input("Enter task number to mark as complete: "))
+            todo_list.mark_task_complete(task_id)
             todo_list.view_tasks()
         elif choice == '5':
             todo_list.save_tasks('tasks.txt')
+            todo_list.close()
             print("Tasks saved to file. Goodbye!")
             break
+        elif choice == '6':
+            query = input("Enter words to search for (end a word with * to match a prefix): ")
+            for task_id in todo_list.search(query):
+                print(f"\n{task_id}. {todo_list.get_task(task_id)}")
         else:
             print("Invalid option. Please try again.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
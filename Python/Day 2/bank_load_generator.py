@@ -0,0 +1,77 @@
+#Load generator for bank_server.py: opens several connections, each keeping a pipeline of
+#requests in flight, and reports ops/sec and p50/p99 latency
+
+import argparse
+import asyncio
+import random
+import time
+
+
+async def run_client(host, port, accounts, requests, pipeline, latencies, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    sent = 0
+    while sent < requests:
+        count = min(pipeline, requests - sent)
+        lines = []
+        for _ in range(count):
+            roll = rng.random()
+            account = rng.choice(accounts)
+            if roll < 0.45:
+                lines.append(f"DEPOSIT {account} {rng.randint(1, 100)}\n")
+            elif roll < 0.9:
+                lines.append(f"WITHDRAW {account} {rng.randint(1, 100)}\n")
+            else:
+                lines.append(f"BALANCE {account}\n")
+        start = time.perf_counter()
+        writer.write(''.join(lines).encode())
+        await writer.drain()
+        for _ in range(count):
+            await reader.readline()
+            #latency of a request: from sending its pipeline to reading its response
+            latencies.append(time.perf_counter() - start)
+        sent += count
+    writer.close()
+    await writer.wait_closed()
+
+
+async def create_accounts(host, port, count):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"CREATE\n" * count)
+    await writer.drain()
+    accounts = []
+    for _ in range(count):
+        response = (await reader.readline()).decode().split()
+        accounts.append(int(response[1]))
+    writer.close()
+    await writer.wait_closed()
+    return accounts
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def main(args):
+    accounts = await create_accounts(args.host, args.port, args.accounts)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(args.host, args.port, accounts, args.requests, args.pipeline, latencies, seed)
+                           for seed in range(args.connections)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"{total} requests over {args.connections} connections, pipeline depth {args.pipeline}")
+    print(f"Throughput: {total / elapsed:,.0f} ops/sec")
+    print(f"Latency p50: {percentile(latencies, 0.50) * 1000:.2f} ms, p99: {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for the bank server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8888)
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=20000, help="Requests per connection")
+    parser.add_argument('--pipeline', type=int, default=64, help="Requests in flight per connection")
+    parser.add_argument('--accounts', type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
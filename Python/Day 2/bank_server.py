@@ -0,0 +1,165 @@
+#Asyncio TCP front-end for the Bank
+#
+#One request per line, one response line per request, in the same order:
+#   CREATE                                -> OK <account_number>
+#   DEPOSIT <account_number> <amount>     -> OK | ERR rejected
+#   WITHDRAW <account_number> <amount>    -> OK | ERR rejected
+#   BALANCE <account_number>              -> OK <balance> | ERR account not found
+#   HISTORY <account_number> [page] [page_size]
+#                                         -> OK <kind>:<amount>:<timestamp> ... | ERR account not found
+#Clients may pipeline: send many requests without waiting for the answers. Everything that
+#arrived in one read is answered with a single write, and runs of deposits and withdrawals
+#are applied with one Bank.apply_batch call. A line longer than MAX_LINE_LENGTH is answered
+#with ERR line too long and the connection is closed
+
+import argparse
+import asyncio
+import math
+
+from banking import Bank, KIND_NAMES
+
+KIND_LABELS = {code: name for name, code in KIND_NAMES.items()}
+READ_SIZE = 64 * 1024
+MAX_LINE_LENGTH = 4096
+
+
+class BankProtocolError(Exception):
+    pass
+
+
+class BankServer:
+    def __init__(self, bank):
+        self.bank = bank
+
+    async def handle_client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        leftover = b''
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                lines = (leftover + data).split(b'\n')
+                #the last piece is an unfinished line, keep it for the next read
+                leftover = lines.pop()
+                if lines:
+                    #the bank's locks, fsync and snapshots block, so they run on a worker thread
+                    #and the other connections keep being served meanwhile
+                    writer.write(await loop.run_in_executor(None, self.handle_batch, lines))
+                    await writer.drain()
+                if len(leftover) > MAX_LINE_LENGTH:
+                    writer.write(b"ERR line too long\n")
+                    await writer.drain()
+                    break
+        except ConnectionResetError:
+            pass
+        finally:
+            writer.close()
+
+    def handle_batch(self, lines):
+        responses = self.handle_lines(lines)
+        #make the changes durable before acknowledging them, one fsync per pipelined batch
+        self.bank.commit()
+        return responses
+
+    def handle_lines(self, lines):
+        responses = []
+        #consecutive deposits/withdrawals waiting to go through apply_batch together
+        batch = []
+        batch_slots = []
+        for line in lines:
+            parts = line.decode('utf-8', 'replace').split()
+            if not parts:
+                continue
+            command = parts[0].upper()
+            try:
+                if command in ('DEPOSIT', 'WITHDRAW'):
+                    if len(parts) != 3:
+                        raise BankProtocolError(f"usage: {command} <account_number> <amount>")
+                    batch.append((command.lower(), self.parse_int(parts[1]), self.parse_amount(parts[2])))
+                    batch_slots.append(len(responses))
+                    responses.append(None)
+                    continue
+                #anything else may read what the pending batch changes, apply it first
+                self.flush_batch(batch, batch_slots, responses)
+                responses.append(self.handle_command(command, parts[1:]))
+            except BankProtocolError as e:
+                self.flush_batch(batch, batch_slots, responses)
+                responses.append(f"ERR {e}")
+        self.flush_batch(batch, batch_slots, responses)
+        return ''.join(response + '\n' for response in responses).encode('utf-8')
+
+    def flush_batch(self, batch, batch_slots, responses):
+        if not batch:
+            return
+        for slot, ok in zip(batch_slots, self.bank.apply_batch(batch)):
+            responses[slot] = 'OK' if ok else 'ERR rejected'
+        batch.clear()
+        batch_slots.clear()
+
+    def handle_command(self, command, args):
+        if command == 'CREATE':
+            return f"OK {self.bank.open_account().account_number}"
+        if command == 'BALANCE':
+            if len(args) != 1:
+                raise BankProtocolError("usage: BALANCE <account_number>")
+            balance = self.bank.get_balance(self.parse_int(args[0]))
+            return "ERR account not found" if balance is None else f"OK {balance}"
+        if command == 'HISTORY':
+            if not 1 <= len(args) <= 3:
+                raise BankProtocolError("usage: HISTORY <account_number> [page] [page_size]")
+            page = self.parse_int(args[1]) if len(args) > 1 else 1
+            page_size = self.parse_int(args[2]) if len(args) > 2 else 10
+            if page < 1 or page_size < 1:
+                raise BankProtocolError("page and page_size must be positive")
+            entries = self.bank.get_history(self.parse_int(args[0]), page, page_size)
+            if entries is None:
+                return "ERR account not found"
+            items = [f"{KIND_LABELS[kind]}:{amount}:{timestamp:.6f}" for _, kind, amount, timestamp, _ in entries]
+            return ' '.join(['OK'] + items)
+        raise BankProtocolError(f"unknown command {command}")
+
+    @staticmethod
+    def parse_int(value):
+        try:
+            return int(value)
+        except ValueError:
+            raise BankProtocolError(f"not a number: {value}")
+
+    @staticmethod
+    def parse_amount(value):
+        try:
+            amount = float(value)
+        except ValueError:
+            raise BankProtocolError(f"not an amount: {value}")
+        #float() also takes inf and nan, which would poison the balance, the log and every snapshot after
+        if not math.isfinite(amount):
+            raise BankProtocolError(f"not an amount: {value}")
+        return amount
+
+
+async def serve(bank, host, port):
+    server = await asyncio.start_server(BankServer(bank).handle_client, host, port)
+    print(f"Bank server listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bank TCP server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8888)
+    parser.add_argument('--data-dir', default='bank_data', help="Directory for the write-ahead log and snapshots")
+    args = parser.parse_args()
+
+    bank = Bank(args.data_dir)
+    try:
+        asyncio.run(serve(bank, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bank.close()
+        print("Bank server stopped.")
+
+if __name__ == "__main__":
+    main()
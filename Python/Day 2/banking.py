@@ -1,47 +1,365 @@
 # A simple banking app to learn about python
 
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import ExitStack, contextmanager
+
+DEPOSIT, WITHDRAW, TRANSFER_IN, TRANSFER_OUT = range(4)
+KIND_NAMES = {'deposit': DEPOSIT, 'withdraw': WITHDRAW, 'transfer_in': TRANSFER_IN, 'transfer_out': TRANSFER_OUT}
+
+class TransactionHistory:
+    #append-only history kept in parallel typed arrays, one entry per transaction
+    #counterparts holds the other account of a transfer and 0 for everything else
+    def __init__(self):
+        self.kinds = array('B')
+        self.amounts = array('d')
+        self.timestamps = array('d')
+        self.counterparts = array('q')
+        self.totals = array('d', [0.0] * len(KIND_NAMES))
+        self.counts = array('q', [0] * len(KIND_NAMES))
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def append(self, kind, amount, counterpart=0, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        #keep timestamps sorted even if the clock steps back, time range queries bisect on them
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            timestamp = self.timestamps[-1]
+        self.kinds.append(kind)
+        self.amounts.append(amount)
+        self.timestamps.append(timestamp)
+        self.counterparts.append(counterpart)
+        self.totals[kind] += amount
+        self.counts[kind] += 1
+        return timestamp
+
+    def total(self, kind):
+        return self.totals[kind]
+
+    def count(self, kind):
+        return self.counts[kind]
+
+    def query(self, kind=None, start=None, end=None, offset=0, limit=None):
+        #yields (number, kind, amount, timestamp, counterpart) for entries of the given kind
+        #with start <= timestamp <= end, skipping the first offset matches
+        if offset < 0:
+            raise ValueError(f"offset must not be negative, got {offset}")
+        first = 0 if start is None else bisect_left(self.timestamps, start)
+        last = len(self.kinds) if end is None else bisect_right(self.timestamps, end)
+        if kind is None:
+            #no kind filter, so the page can be sliced out directly
+            first = min(first + offset, last)
+            offset = 0
+        returned = 0
+        for i in range(first, last):
+            if limit is not None and returned >= limit:
+                return
+            if kind is not None and self.kinds[i] != kind:
+                continue
+            if offset:
+                offset -= 1
+                continue
+            returned += 1
+            yield i + 1, self.kinds[i], self.amounts[i], self.timestamps[i], self.counterparts[i]
+
+    @staticmethod
+    def page_args(page, page_size, kind):
+        #(kind code, offset) for query, ValueError for a page, page size or kind that makes no sense
+        if page < 1:
+            raise ValueError("Page numbers start at 1.")
+        if page_size is not None and page_size < 1:
+            raise ValueError("Page size must be at least 1.")
+        if kind and kind not in KIND_NAMES:
+            raise ValueError(f"Unknown transaction type: {kind}")
+        kind_code = KIND_NAMES[kind] if kind else None
+        return kind_code, (page - 1) * page_size if page_size else 0
+
+    @staticmethod
+    def describe(kind, amount, counterpart):
+        if kind == DEPOSIT:
+            return f"Deposit: {amount}"
+        if kind == WITHDRAW:
+            return f"Withdraw: {amount}"
+        if kind == TRANSFER_IN:
+            return f"Transfer from {counterpart}: {amount}"
+        return f"Transfer to {counterpart}: {amount}"
+
+
 class Account:
     account_counter = 10000
+    counter_lock = threading.Lock()
     
-    def __init__(self):
-        Account.account_counter += 1
-        self.account_number = Account.account_counter
+    def __init__(self, account_number=None):
+        with Account.counter_lock:
+            if account_number is None:
+                Account.account_counter += 1
+                account_number = Account.account_counter
+            else:
+                #restored accounts keep their number, new ones must come after it
+                Account.account_counter = max(Account.account_counter, account_number)
+            self.account_number = account_number
         self.balance = 0
-        self.transaction_history = []
+        self.transaction_history = TransactionHistory()
+        #guards balance and transaction_history, take it before touching either
+        self.lock = threading.Lock()
+        #BankStore the account logs its changes to, if the bank is durable
+        self.store = None
     
     def deposit(self, amount):
-        if amount > 0:
-            self.balance += amount
-            self.transaction_history.append(f"Deposit: {amount}")
-            print(f"Deposit succesful. New balance: {self.balance}")
+        with self.lock:
+            ok = self._apply_deposit(amount)
+            balance = self.balance
+        if ok:
+            print(f"Deposit succesful. New balance: {balance}")
         else:
             print("Invalid Deposit Amount")
+        return ok
     
     def withdraw(self, amount):
-        if amount > 0 and amount <= self.balance:
-            self.balance -= amount
-            self.transaction_history.append(f"Withdraw: {amount}")
-            print(f"Widthdraw succesful. New balance: {self.balance}")
+        with self.lock:
+            ok = self._apply_withdraw(amount)
+            balance = self.balance
+        if ok:
+            print(f"Widthdraw succesful. New balance: {balance}")
         else:
             print("Invalid or Insufficient funds for withdrawl.")
+        return ok
     
     def view_balance(self):
         print(f"Current: {self.balance}")
     
-    def view_transaction_history(self):
+    def view_transaction_history(self, page=1, page_size=None, kind=None, start=None, end=None):
+        #kind is one of KIND_NAMES, start and end are unix timestamps
+        try:
+            kind_code, offset = TransactionHistory.page_args(page, page_size, kind)
+        except ValueError as e:
+            print(e)
+            return
+        with self.lock:
+            entries = list(self.transaction_history.query(kind_code, start, end, offset, page_size))
         print("Transaction history: ")
-        for i, transaction in enumerate(self.transaction_history, start=1):
-            print(f"{i}. {transaction}")
+        for number, kind_code, amount, timestamp, counterpart in entries:
+            print(f"{number}. {TransactionHistory.describe(kind_code, amount, counterpart)}")
+
+    #the _apply_* helpers expect the caller to hold self.lock and don't print
+    def _apply_deposit(self, amount, timestamp=None):
+        if amount > 0:
+            self.balance += amount
+            timestamp = self.transaction_history.append(DEPOSIT, amount, timestamp=timestamp)
+            if self.store:
+                self.store.log(BankStore.DEPOSIT, self.account_number, 0, amount, timestamp)
+            return True
+        return False
+
+    def _apply_withdraw(self, amount, timestamp=None):
+        if amount > 0 and amount <= self.balance:
+            self.balance -= amount
+            timestamp = self.transaction_history.append(WITHDRAW, amount, timestamp=timestamp)
+            if self.store:
+                self.store.log(BankStore.WITHDRAW, self.account_number, 0, amount, timestamp)
+            return True
+        return False
     
 
+class BankStore:
+    #durability for a Bank: every accepted change goes to an append-only write-ahead log,
+    #and the whole bank is written to a binary snapshot every snapshot_every records.
+    #log records are buffered and written + fsynced in groups of group_size (group commit),
+    #so a crash can lose the changes since the last commit() but never corrupts the files
+    OPEN, DEPOSIT, WITHDRAW, TRANSFER = range(4)
+    #op, account, counterpart (transfer target), amount, timestamp
+    record = struct.Struct('<Bqqdd')
+    #every snapshot starts a new generation of the log; the snapshot names the generation
+    #to replay on top of it, and the log names the generation it belongs to
+    wal_header = struct.Struct('<8sq')
+    wal_magic = b'BANKWAL1'
+    snapshot_header = struct.Struct('<8sqqq')
+    account_header = struct.Struct('<qdq')
+    magic = b'BANKSNP2'
+
+    def __init__(self, data_dir, group_size=100, group_interval=0.05, snapshot_every=100000):
+        self.data_dir = data_dir
+        self.wal_path = os.path.join(data_dir, 'bank.wal')
+        self.snapshot_path = os.path.join(data_dir, 'bank.snapshot')
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.snapshot_every = snapshot_every
+        self.lock = threading.Lock()
+        self.pending = bytearray()
+        self.pending_records = 0
+        self.last_sync = time.monotonic()
+        self.records_since_snapshot = 0
+        self.generation = 0
+        self.wal = None
+        os.makedirs(data_dir, exist_ok=True)
+
+    def log(self, op, account_number, counterpart, amount, timestamp):
+        with self.lock:
+            self.pending += self.record.pack(op, account_number, counterpart, amount, timestamp)
+            self.pending_records += 1
+            self.records_since_snapshot += 1
+            if self.pending_records >= self.group_size or time.monotonic() - self.last_sync >= self.group_interval:
+                self._sync()
+
+    def log_many(self, records, count):
+        #records is count already packed log records, written and synced as one group
+        with self.lock:
+            self.pending += records
+            self.pending_records += count
+            self.records_since_snapshot += count
+            self._sync()
+
+    def commit(self):
+        with self.lock:
+            self._sync()
+
+    def close(self):
+        self.commit()
+        if self.wal:
+            self.wal.close()
+            self.wal = None
+
+    def _sync(self):
+        if self.pending:
+            self.wal.write(self.pending)
+            self.wal.flush()
+            os.fsync(self.wal.fileno())
+            self.pending.clear()
+            self.pending_records = 0
+        self.last_sync = time.monotonic()
+
+    def recover(self, bank):
+        #load the latest snapshot, then replay whatever the log recorded after it
+        if os.path.exists(self.snapshot_path):
+            self._load_snapshot(bank)
+        records = self._replay_wal(bank) if os.path.exists(self.wal_path) else None
+        if records is None:
+            self._start_wal()
+            records = 0
+        else:
+            #drop a half-written record left by a crash before appending after it
+            os.truncate(self.wal_path, self.wal_header.size + records * self.record.size)
+            self.wal = open(self.wal_path, 'ab')
+        self.records_since_snapshot = records
+
+    def _replay_wal(self, bank):
+        #number of whole records replayed, or None if the log has nothing the snapshot lacks
+        with open(self.wal_path, 'rb') as f:
+            data = f.read()
+        if len(data) < self.wal_header.size:
+            return None
+        magic, generation = self.wal_header.unpack_from(data)
+        if magic != self.wal_magic:
+            raise ValueError(f"{self.wal_path} is not a bank log")
+        if generation < self.generation:
+            #a crash came between writing a snapshot and starting its log, the snapshot already holds all of this
+            return None
+        if generation > self.generation:
+            raise ValueError(f"{self.wal_path} continues a snapshot newer than {self.snapshot_path}")
+        records = (len(data) - self.wal_header.size) // self.record.size
+        end = self.wal_header.size + records * self.record.size
+        for op, account_number, counterpart, amount, timestamp in self.record.iter_unpack(data[self.wal_header.size:end]):
+            if op == self.OPEN:
+                if account_number not in bank.accounts:
+                    bank._restore_account(account_number)
+                continue
+            account = bank.accounts[account_number]
+            if op == self.DEPOSIT:
+                account._apply_deposit(amount, timestamp)
+            elif op == self.WITHDRAW:
+                account._apply_withdraw(amount, timestamp)
+            elif op == self.TRANSFER:
+                accounts = {account_number: account, counterpart: bank.accounts[counterpart]}
+                bank._apply_transfer(accounts, account_number, counterpart, amount, timestamp)
+        return records
+
+    def _start_wal(self):
+        #an empty log of the current generation, swapped in whole so it is never seen half written
+        temp_path = self.wal_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(self.wal_header.pack(self.wal_magic, self.generation))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.wal_path)
+        self.wal = open(self.wal_path, 'ab')
+
+    def snapshot(self, bank):
+        #the caller holds the bank lock and every account lock, so nothing changes underneath
+        generation = self.generation + 1
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(self.snapshot_header.pack(self.magic, generation, Account.account_counter, len(bank.accounts)))
+            for account in bank.accounts.values():
+                history = account.transaction_history
+                f.write(self.account_header.pack(account.account_number, account.balance, len(history)))
+                for column in (history.kinds, history.amounts, history.timestamps, history.counterparts):
+                    column.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        with self.lock:
+            #everything logged so far is in the snapshot; from the moment it is in place the old log
+            #belongs to an earlier generation, so recovery ignores it until the new one replaces it
+            os.replace(temp_path, self.snapshot_path)
+            self.generation = generation
+            self.pending.clear()
+            self.pending_records = 0
+            self.wal.close()
+            self._start_wal()
+            self.records_since_snapshot = 0
+
+    def _load_snapshot(self, bank):
+        with open(self.snapshot_path, 'rb') as f:
+            magic, generation, account_counter, account_count = self.snapshot_header.unpack(f.read(self.snapshot_header.size))
+            if magic != self.magic:
+                raise ValueError(f"{self.snapshot_path} is not a bank snapshot")
+            self.generation = generation
+            for _ in range(account_count):
+                account_number, balance, length = self.account_header.unpack(f.read(self.account_header.size))
+                account = bank._restore_account(account_number)
+                account.balance = balance
+                history = account.transaction_history
+                for column in (history.kinds, history.amounts, history.timestamps, history.counterparts):
+                    column.fromfile(f, length)
+                for kind, amount in zip(history.kinds, history.amounts):
+                    history.totals[kind] += amount
+                    history.counts[kind] += 1
+        with Account.counter_lock:
+            Account.account_counter = max(Account.account_counter, account_counter)
+
+
 class Bank:
-    def __init__(self):
+    def __init__(self, data_dir=None, **store_options):
+        #with a data_dir the bank is durable, see BankStore for the options
         self.accounts = {}
+        self.lock = threading.Lock()
+        self.store = None
+        if data_dir:
+            store = BankStore(data_dir, **store_options)
+            store.recover(self)
+            self.store = store
+            for account in self.accounts.values():
+                account.store = store
+        self.snapshot_lock = threading.Lock()
+
+    def open_account(self):
+        with self.lock:
+            account = Account()
+            self.accounts[account.account_number] = account
+            if self.store:
+                account.store = self.store
+                self.store.log(BankStore.OPEN, account.account_number, 0, 0.0, time.time())
+        return account
     
     def create_account(self):
-        account = Account()
-        self.accounts[account.account_number] = account
+        account = self.open_account()
         print(f"Account created. Your account number is: {account.account_number}")
+        return account.account_number
         
     def get_account(self, account_number):
         return self.accounts.get(account_number)
@@ -49,17 +367,77 @@ class Bank:
     def deposit(self, account_number, amount):
         account = self.get_account(account_number)
         if account:
-            account.deposit(amount)
+            ok = account.deposit(amount)
+            self._maybe_snapshot()
+            return ok
         else:
             print("Account not found.")
+            return False
             
     def withdraw(self, account_number, amount):
         account = self.get_account(account_number)
         if account:
-            account.withdraw(amount)
+            ok = account.withdraw(amount)
+            self._maybe_snapshot()
+            return ok
         else:
             print("Account not found.")
+            return False
+
+    def transfer(self, src, dst, amount):
+        with self._locked([src, dst]) as accounts:
+            ok = self._apply_transfer(accounts, src, dst, amount)
+        self._maybe_snapshot()
+        if ok:
+            print(f"Transfer of {amount} from {src} to {dst} succesful.")
+        else:
+            print("Transfer failed. Check the account numbers, amount and balance.")
+        return ok
+
+    def apply_batch(self, transactions):
+        #transactions are ('deposit', account, amount), ('withdraw', account, amount)
+        #or ('transfer', src, dst, amount); every account involved is locked once for the whole batch
+        #returns one True/False per transaction, in order
+        account_numbers = set()
+        for transaction in transactions:
+            account_numbers.update(transaction[1:-1])
+        results = []
+        with self._locked(account_numbers) as accounts:
+            for kind, *args in transactions:
+                if kind == 'transfer':
+                    results.append(self._apply_transfer(accounts, *args))
+                    continue
+                account_number, amount = args
+                account = accounts.get(account_number)
+                if account is None:
+                    results.append(False)
+                elif kind == 'deposit':
+                    results.append(account._apply_deposit(amount))
+                elif kind == 'withdraw':
+                    results.append(account._apply_withdraw(amount))
+                else:
+                    results.append(False)
+        self._maybe_snapshot()
+        return results
             
+    def get_balance(self, account_number):
+        #balance as data, None for an unknown account
+        account = self.get_account(account_number)
+        if not account:
+            return None
+        with account.lock:
+            return account.balance
+
+    def get_history(self, account_number, page=1, page_size=None, kind=None, start=None, end=None):
+        #list of (number, kind, amount, timestamp, counterpart), None for an unknown account
+        #raises ValueError for a page below 1, a page_size below 1 or a kind that is not in KIND_NAMES
+        kind_code, offset = TransactionHistory.page_args(page, page_size, kind)
+        account = self.get_account(account_number)
+        if not account:
+            return None
+        with account.lock:
+            return list(account.transaction_history.query(kind_code, start, end, offset, page_size))
+
     def view_balance(self, account_number):
         account = self.get_account(account_number)
         if account:
@@ -67,18 +445,77 @@ class Bank:
         else:
             print("Account not found.")
     
-    def view_transaction_history(self, account_number):
+    def view_transaction_history(self, account_number, page=1, page_size=None, kind=None, start=None, end=None):
         account = self.get_account(account_number)
         if account:
-            account.view_transaction_history()
+            account.view_transaction_history(page, page_size, kind, start, end)
         else:
             print("Account not found.")
 
+    @contextmanager
+    def _locked(self, account_numbers):
+        #always lock in account number order, so two threads can never wait on each other
+        accounts = {}
+        for account_number in sorted(set(account_numbers)):
+            account = self.get_account(account_number)
+            if account:
+                accounts[account_number] = account
+        with ExitStack() as stack:
+            for account in accounts.values():
+                stack.enter_context(account.lock)
+            yield accounts
+
+    def _apply_transfer(self, accounts, src, dst, amount, timestamp=None):
+        source = accounts.get(src)
+        target = accounts.get(dst)
+        if not source or not target or src == dst:
+            return False
+        if amount > 0 and amount <= source.balance:
+            source.balance -= amount
+            target.balance += amount
+            timestamp = source.transaction_history.append(TRANSFER_OUT, amount, dst, timestamp)
+            target.transaction_history.append(TRANSFER_IN, amount, src, timestamp)
+            if self.store:
+                self.store.log(BankStore.TRANSFER, src, dst, amount, timestamp)
+            return True
+        return False
+
+    def _restore_account(self, account_number):
+        account = Account(account_number)
+        self.accounts[account_number] = account
+        return account
+
+    def snapshot(self):
+        if not self.store:
+            return
+        with self.lock, self._locked(self.accounts):
+            self.store.commit()
+            self.store.snapshot(self)
+
+    def commit(self):
+        if self.store:
+            self.store.commit()
+
+    def close(self):
+        if self.store:
+            self.store.close()
+
+    def _maybe_snapshot(self):
+        #called after the account locks are released; one thread takes the snapshot, the others carry on
+        if not self.store or self.store.records_since_snapshot < self.store.snapshot_every:
+            return
+        if self.snapshot_lock.acquire(blocking=False):
+            try:
+                if self.store.records_since_snapshot >= self.store.snapshot_every:
+                    self.snapshot()
+            finally:
+                self.snapshot_lock.release()
+
 def main():
-    bank = Bank()
+    bank = Bank('bank_data')
 
     while True:
-        print("\nChoose an option to perform operation\n 1. Create Account\n 2. Deposit\n 3. Withdraw\n 4. View Balance\n 5. View Transaction History\n 6. Exit")
+        print("\nChoose an option to perform operation\n 1. Create Account\n 2. Deposit\n 3. Withdraw\n 4. View Balance\n 5. View Transaction History\n 6. Transfer\n 7. Exit")
         choice = input("Choose an option: ")
 
         if choice == '1':
@@ -96,8 +533,22 @@ def main():
             bank.view_balance(account_number)
         elif choice == '5':
             account_number = int(input("Enter account number: "))
-            bank.view_transaction_history(account_number)
+            kind = input("Filter by type (deposit, withdraw, transfer_in, transfer_out or press Enter for all): ").strip().lower()
+            if kind and kind not in KIND_NAMES:
+                print("Unknown transaction type, showing all.")
+                kind = None
+            page = input("Enter page number (or press Enter for all): ").strip()
+            if page:
+                bank.view_transaction_history(account_number, int(page), 10, kind or None)
+            else:
+                bank.view_transaction_history(account_number, kind=kind or None)
         elif choice == '6':
+            src = int(input("Enter account number to transfer from: "))
+            dst = int(input("Enter account number to transfer to: "))
+            amount = float(input("Enter amount to transfer: "))
+            bank.transfer(src, dst, amount)
+        elif choice == '7':
+            bank.close()
             print("Thank you for your patience!")
             break
         else:
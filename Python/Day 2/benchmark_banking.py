@@ -0,0 +1,99 @@
+#Throughput benchmark for the Bank: random transfers from several worker threads,
+#one transfer at a time and grouped into batches of 100, and durable commits/sec
+#with an fsync per change vs group commit
+
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from banking import Bank
+
+ACCOUNTS = 1000
+INITIAL_BALANCE = 1_000_000
+
+
+def make_bank():
+    bank = Bank()
+    numbers = []
+    for _ in range(ACCOUNTS):
+        account = bank.open_account()
+        account._apply_deposit(INITIAL_BALANCE)
+        numbers.append(account.account_number)
+    return bank, numbers
+
+
+def total_balance(bank):
+    return sum(account.balance for account in bank.accounts.values())
+
+
+def run_threads(num_threads, ops_per_thread, worker):
+    threads = [threading.Thread(target=worker, args=(seed, ops_per_thread)) for seed in range(num_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def single_transfers(bank, numbers):
+    def worker(seed, count):
+        rng = random.Random(seed)
+        for _ in range(count):
+            src, dst = rng.sample(numbers, 2)
+            #a batch of one is a transfer() without the printing
+            bank.apply_batch([('transfer', src, dst, rng.randint(1, 100))])
+    return worker
+
+
+def batched_transfers(bank, numbers, batch_size):
+    def worker(seed, count):
+        rng = random.Random(seed)
+        for _ in range(count // batch_size):
+            #each batch works on a small group of accounts, like one customer's standing orders
+            group = rng.sample(numbers, 8)
+            batch = []
+            for _ in range(batch_size):
+                src, dst = rng.sample(group, 2)
+                batch.append(('transfer', src, dst, rng.randint(1, 100)))
+            bank.apply_batch(batch)
+    return worker
+
+
+def durable_deposits(group_size, count):
+    with tempfile.TemporaryDirectory() as data_dir:
+        #interval 0 would force a sync on every record, so only group_size decides here
+        bank = Bank(data_dir, group_size=group_size, group_interval=3600, snapshot_every=10 ** 9)
+        account = bank.open_account()
+        start = time.perf_counter()
+        for _ in range(count):
+            bank.apply_batch([('deposit', account.account_number, 10)])
+        bank.commit()
+        elapsed = time.perf_counter() - start
+        bank.close()
+    return count / elapsed
+
+
+if __name__ == "__main__":
+    TOTAL_OPS = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+    BATCH_SIZE = 100
+
+    for num_threads in (1, 4, 16):
+        ops_per_thread = TOTAL_OPS // num_threads
+        ops = ops_per_thread * num_threads
+
+        bank, numbers = make_bank()
+        elapsed = run_threads(num_threads, ops_per_thread, single_transfers(bank, numbers))
+        assert total_balance(bank) == ACCOUNTS * INITIAL_BALANCE
+        print(f"{num_threads:>2} threads, single ops:  {ops / elapsed:>10,.0f} ops/sec")
+
+        bank, numbers = make_bank()
+        elapsed = run_threads(num_threads, ops_per_thread, batched_transfers(bank, numbers, BATCH_SIZE))
+        assert total_balance(bank) == ACCOUNTS * INITIAL_BALANCE
+        print(f"{num_threads:>2} threads, batches:     {ops / elapsed:>10,.0f} ops/sec")
+
+    print()
+    for group_size, count in ((1, 2_000), (100, 100_000), (1000, 100_000)):
+        print(f"WAL, fsync every {group_size:>4} records: {durable_deposits(group_size, count):>10,.0f} commits/sec")
@@ -0,0 +1,184 @@
+#Bulk statement processing for the Bank: applies a whole file of deposits and withdrawals
+#with NumPy array operations instead of one Bank.deposit/withdraw call per row.
+#The rules are the same as the scalar path: amounts must be positive, unknown accounts are
+#rejected and a withdrawal is rejected if it would overdraw the account at that point
+
+import sys
+import time
+from array import array
+from functools import reduce
+from operator import add
+
+import numpy as np
+
+from banking import Bank, BankStore, DEPOSIT, WITHDRAW
+
+#statement files are "account_number,type,amount" lines, type being deposit or withdraw
+STATEMENT_DTYPE = [('account', 'i8'), ('kind', 'U8'), ('amount', 'f8')]
+#same layout as BankStore.record, so accepted rows can go to the log in one write
+WAL_DTYPE = np.dtype([('op', 'u1'), ('account', '<i8'), ('counterpart', '<i8'), ('amount', '<f8'), ('timestamp', '<f8')])
+#accounts with more rows than this are settled one account at a time with cumulative sums,
+#the rest together, one row per account per step
+LONG_RUN = 64
+
+
+def load_statement(path):
+    rows = np.loadtxt(path, delimiter=',', dtype=STATEMENT_DTYPE, comments='#', ndmin=1,
+                      skiprows=_header_lines(path))
+    kinds = np.full(len(rows), -1, dtype=np.int8)
+    kinds[rows['kind'] == 'deposit'] = DEPOSIT
+    kinds[rows['kind'] == 'withdraw'] = WITHDRAW
+    return rows['account'], kinds, rows['amount']
+
+
+def _header_lines(path):
+    with open(path) as f:
+        first = f.readline()
+    return 1 if first.startswith('account') else 0
+
+
+def process_statement(bank, path):
+    return apply_statement(bank, *load_statement(path))
+
+
+def apply_statement(bank, account_numbers, kinds, amounts):
+    #returns a bool array, True where the row was applied
+    account_numbers = np.asarray(account_numbers, dtype=np.int64)
+    kinds = np.asarray(kinds, dtype=np.int8)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    accepted = np.zeros(len(amounts), dtype=bool)
+
+    unique_numbers, account_index = np.unique(account_numbers, return_inverse=True)
+    with bank._locked(unique_numbers.tolist()) as locked:
+        accounts = [locked.get(number) for number in unique_numbers.tolist()]
+        known = np.array([account is not None for account in accounts], dtype=bool)
+        #rows that can never be applied don't touch the balance, leave them out entirely
+        candidates = np.flatnonzero(known[account_index] & (amounts > 0) & ((kinds == DEPOSIT) | (kinds == WITHDRAW)))
+        if len(candidates) == 0:
+            return accepted
+
+        balances = np.array([account.balance if account else 0.0 for account in accounts], dtype=np.float64)
+        signed = np.where(kinds == DEPOSIT, amounts, -amounts)
+
+        #group the candidate rows by account, keeping file order inside each group
+        order = candidates[np.argsort(account_index[candidates], kind='stable')]
+        group_of_row = account_index[order]
+        starts = np.flatnonzero(np.r_[True, group_of_row[1:] != group_of_row[:-1]])
+        lengths = np.diff(np.r_[starts, len(order)])
+
+        long_groups = lengths > LONG_RUN
+        for start, length in zip(starts[long_groups].tolist(), lengths[long_groups].tolist()):
+            rows = order[start:start + length]
+            account = account_index[rows[0]]
+            balances[account] = _settle_account(balances[account], kinds[rows], amounts[rows], signed[rows], rows, accepted)
+
+        #position of each row inside its account's group
+        positions = np.arange(len(order)) - np.repeat(starts, lengths)
+        short = np.repeat(~long_groups, lengths)
+        _settle_together(balances, account_index, kinds, amounts, signed, order[short], positions[short], accepted)
+
+        touched = _record_history(accounts, balances, account_index, kinds, amounts, order, accepted)
+        if bank.store and touched:
+            _log_rows(bank.store, account_numbers, account_index, kinds, amounts, accepted, touched)
+    bank._maybe_snapshot()
+    return accepted
+
+
+def _settle_together(balances, account_index, kinds, amounts, signed, rows, positions, accepted):
+    #step k applies the k-th row of every account at once; an account shows up at most once per
+    #step, so the rows of one account are still applied strictly in file order
+    if len(rows) == 0:
+        return
+    by_step = np.argsort(positions, kind='stable')
+    rows = rows[by_step]
+    step_ends = np.cumsum(np.bincount(positions))
+    step_start = 0
+    for step_end in step_ends.tolist():
+        step = rows[step_start:step_end]
+        step_start = step_end
+        accounts = account_index[step]
+        ok = (kinds[step] == DEPOSIT) | (amounts[step] <= balances[accounts])
+        balances[accounts[ok]] += signed[step[ok]]
+        accepted[step[ok]] = True
+
+
+def _settle_account(balance, kinds, amounts, signed, rows, accepted):
+    #running balance from a cumulative sum; on the first rejected withdrawal, skip that row and
+    #carry on from the balance just before it. np.cumsum adds strictly left to right, so the
+    #balances are bit-for-bit the ones the scalar path computes
+    start = 0
+    while start < len(rows):
+        running = np.cumsum(np.r_[balance, signed[start:]])
+        before = running[:-1]
+        rejected = np.flatnonzero((kinds[start:] == WITHDRAW) & (amounts[start:] > before))
+        if len(rejected) == 0:
+            accepted[rows[start:]] = True
+            return running[-1]
+        first = rejected[0]
+        accepted[rows[start:start + first]] = True
+        balance = before[first]
+        start += first + 1
+    return balance
+
+
+def _record_history(accounts, balances, account_index, kinds, amounts, order, accepted):
+    #appends the accepted rows to each account's history and returns {account index: timestamp}
+    now = time.time()
+    rows = order[accepted[order]]
+    groups = account_index[rows]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if len(rows) else np.array([], dtype=np.int64)
+    ends = np.r_[starts[1:], len(rows)]
+    row_kinds = kinds[rows].astype(np.uint8)
+    kind_bytes = memoryview(row_kinds.tobytes())
+    amount_bytes = memoryview(amounts[rows].tobytes()).cast('B')
+    #per kind, the amount or 0.0 so each total is one left-to-right sum over the account's rows
+    kind_amounts = {kind: np.where(row_kinds == kind, amounts[rows], 0.0).tolist() for kind in (DEPOSIT, WITHDRAW)}
+    kind_counts = {kind: np.add.reduceat(row_kinds == kind, starts).tolist() if len(rows) else [] for kind in (DEPOSIT, WITHDRAW)}
+    touched = {}
+    for group, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        index = int(groups[start])
+        account = accounts[index]
+        history = account.transaction_history
+        timestamp = max(now, history.timestamps[-1]) if len(history) else now
+        count = end - start
+        history.kinds.frombytes(kind_bytes[start:end])
+        history.amounts.frombytes(amount_bytes[start * 8:end * 8])
+        history.timestamps.extend(array('d', [timestamp]) * count)
+        history.counterparts.frombytes(bytes(8 * count))
+        for kind in (DEPOSIT, WITHDRAW):
+            if kind_counts[kind][group]:
+                #same additions in the same order as the scalar +=, adding 0.0 changes nothing
+                history.totals[kind] = reduce(add, kind_amounts[kind][start:end], history.totals[kind])
+                history.counts[kind] += kind_counts[kind][group]
+        account.balance = float(balances[index])
+        touched[index] = timestamp
+    return touched
+
+
+def _log_rows(store, account_numbers, account_index, kinds, amounts, accepted, touched):
+    rows = np.flatnonzero(accepted)
+    timestamps = np.zeros(account_index.max() + 1)
+    for index, timestamp in touched.items():
+        timestamps[index] = timestamp
+    records = np.zeros(len(rows), dtype=WAL_DTYPE)
+    records['op'] = np.where(kinds[rows] == DEPOSIT, BankStore.DEPOSIT, BankStore.WITHDRAW)
+    records['account'] = account_numbers[rows]
+    records['amount'] = amounts[rows]
+    records['timestamp'] = timestamps[account_index[rows]]
+    store.log_many(records.tobytes(), len(records))
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python bulk_statements.py <statement.csv>")
+        return
+    bank = Bank('bank_data')
+    start = time.perf_counter()
+    accepted = process_statement(bank, sys.argv[1])
+    elapsed = time.perf_counter() - start
+    bank.close()
+    print(f"Applied {int(accepted.sum())} of {len(accepted)} transactions in {elapsed:.2f} seconds "
+          f"({len(accepted) - int(accepted.sum())} rejected).")
+
+if __name__ == "__main__":
+    main()
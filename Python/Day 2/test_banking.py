@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from banking import Bank, BankStore
+
+class TestBankRecovery(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.wal_path = os.path.join(self.data_dir, 'bank.wal')
+        # Deposits and withdrawals print, keep the test output clean
+        self.quiet = redirect_stdout(StringIO())
+        self.quiet.__enter__()
+
+    def tearDown(self):
+        self.quiet.__exit__(None, None, None)
+        shutil.rmtree(self.data_dir)
+
+    def reopen(self, bank):
+        bank.close()
+        return Bank(self.data_dir)
+
+    def test_recover_from_log(self):
+        bank = Bank(self.data_dir)
+        account = bank.open_account().account_number
+        bank.deposit(account, 100)
+        bank.withdraw(account, 30)
+        bank = self.reopen(bank)
+        self.assertEqual(bank.get_balance(account), 70)
+        self.assertEqual(len(bank.get_history(account)), 2)
+        bank.close()
+
+    def test_recover_from_snapshot_and_log(self):
+        bank = Bank(self.data_dir)
+        src = bank.open_account().account_number
+        dst = bank.open_account().account_number
+        bank.deposit(src, 100)
+        bank.snapshot()
+        bank.transfer(src, dst, 40)
+        bank = self.reopen(bank)
+        self.assertEqual(bank.get_balance(src), 60)
+        self.assertEqual(bank.get_balance(dst), 40)
+        self.assertEqual(len(bank.get_history(src)), 2)
+        bank.close()
+
+    def test_torn_tail_is_dropped(self):
+        bank = Bank(self.data_dir)
+        account = bank.open_account().account_number
+        bank.deposit(account, 50)
+        bank.close()
+        # A crash in the middle of writing the next record
+        with open(self.wal_path, 'ab') as f:
+            f.write(BankStore.record.pack(BankStore.DEPOSIT, account, 0, 25.0, 0.0)[:7])
+        bank = Bank(self.data_dir)
+        self.assertEqual(bank.get_balance(account), 50)
+        self.assertEqual(os.path.getsize(self.wal_path), BankStore.wal_header.size + 2 * BankStore.record.size)
+        # Records written after recovery must not be glued to the torn bytes
+        bank.deposit(account, 25)
+        bank = self.reopen(bank)
+        self.assertEqual(bank.get_balance(account), 75)
+        self.assertEqual(len(bank.get_history(account)), 2)
+        bank.close()
+
+    def test_crash_between_snapshot_and_new_log(self):
+        bank = Bank(self.data_dir)
+        account = bank.open_account().account_number
+        bank.snapshot()
+        bank.deposit(account, 100)
+        bank.commit()
+        with open(self.wal_path, 'rb') as f:
+            old_log = f.read()
+        bank.snapshot()
+        bank.close()
+        # The snapshot is in place but the crash came before the log was started over
+        with open(self.wal_path, 'wb') as f:
+            f.write(old_log)
+        bank = Bank(self.data_dir)
+        self.assertEqual(bank.get_balance(account), 100)
+        self.assertEqual(len(bank.get_history(account)), 1)
+        bank.deposit(account, 5)
+        bank = self.reopen(bank)
+        self.assertEqual(bank.get_balance(account), 105)
+        self.assertEqual(len(bank.get_history(account)), 2)
+        bank.close()
+
+    def test_log_newer_than_snapshot_is_refused(self):
+        bank = Bank(self.data_dir)
+        bank.open_account()
+        bank.snapshot()
+        bank.close()
+        os.remove(os.path.join(self.data_dir, 'bank.snapshot'))
+        with self.assertRaises(ValueError):
+            Bank(self.data_dir)
+
+if __name__ == '__main__':
+    unittest.main()
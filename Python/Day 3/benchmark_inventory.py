@@ -0,0 +1,55 @@
+#Throughput of the streaming import/export paths of ColumnarInventory
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from columnar_inventory import ColumnarInventory
+
+
+def make_csv(path, rows, chunk_size=1_000_000):
+    rng = np.random.default_rng(0)
+    with open(path, 'w') as f:
+        f.write('name,price,quantity,category\n')
+        for start in range(0, rows, chunk_size):
+            count = min(chunk_size, rows - start)
+            prices = np.round(rng.random(count) * 500, 2)
+            #about 1% of rows break the add_item rules and should be rejected
+            prices[rng.random(count) < 0.005] = 0
+            quantities = rng.integers(-1, 1000, count)
+            categories = rng.integers(0, 20, count)
+            f.writelines(f"SKU {start + i},{price},{quantity},Category {category}\n"
+                         for i, price, quantity, category in zip(range(count), prices.tolist(),
+                                                                 quantities.tolist(), categories.tolist()))
+
+
+def timed(label, rows, action):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = action()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {elapsed:7.2f} s  {rows / elapsed:>12,.0f} rows/sec")
+    return result
+
+
+if __name__ == "__main__":
+    ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        source = os.path.join(work_dir, 'items.csv')
+        print(f"Generating {ROWS:,} rows...")
+        make_csv(source, ROWS)
+
+        inventory = ColumnarInventory()
+        imported, rejected = timed("import_csv", ROWS, lambda: inventory.import_csv(source))
+        print(f"  {imported:,} imported, {rejected:,} rejected")
+        timed("export_csv", imported, lambda: inventory.export_csv(os.path.join(work_dir, 'export.csv')))
+        snapshot = os.path.join(work_dir, 'items.snapshot')
+        timed("save_snapshot", imported, lambda: inventory.save_snapshot(snapshot))
+        print(f"  snapshot size: {os.path.getsize(snapshot) / imported:.1f} bytes/item")
+        timed("load_snapshot", imported, lambda: ColumnarInventory().load_snapshot(snapshot))
@@ -0,0 +1,333 @@
+#Columnar storage engine for the Inventory, backed by a NumPy structured array.
+#Same methods as Inventory, but price, quantity and ids live in one array instead of one
+#Item object per SKU, so valuation, sorting and threshold filters run vectorized
+
+import numpy as np
+
+from inventory_management import Item, NameIndex
+
+ROW_DTYPE = np.dtype([
+    ('item_id', 'i8'),
+    ('price', 'f8'),
+    ('quantity', 'i8'),
+    ('name', 'i4'),        #index into ColumnarInventory.names
+    ('category', 'i4'),    #index into ColumnarInventory.categories
+])
+
+
+class StringTable:
+    #strings stored once in a list, rows refer to them by their code (list index);
+    #with dedupe, equal strings share one code, which pays off for low-cardinality columns
+    def __init__(self, dedupe=True):
+        self.strings = []
+        self.codes = {} if dedupe else None
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, code):
+        return self.strings[code]
+
+    def code(self, string):
+        return self.codes_of([string])[0]
+
+    def codes_of(self, strings):
+        #codes for a whole column at once
+        if self.codes is None:
+            start = len(self.strings)
+            self.strings.extend(strings)
+            return range(start, len(self.strings))
+        codes = self.codes
+        for string in dict.fromkeys(strings):
+            if string not in codes:
+                codes[string] = len(self.strings)
+                self.strings.append(string)
+        return list(map(codes.__getitem__, strings))
+
+
+class ColumnarInventory:
+    def __init__(self, capacity=1024):
+        self.rows = np.zeros(capacity, dtype=ROW_DTYPE)
+        self.size = 0
+        #item id -> row; deleting moves the last row into the hole, so rows stay packed
+        self.row_of = {}
+        #names are nearly all distinct, deduplicating them would only cost a dict entry each
+        self.names = StringTable(dedupe=False)
+        self.categories = StringTable()
+        self.name_index = NameIndex()
+        #(item_id, name) pairs not yet in name_index; bulk loads defer indexing to the first lookup
+        self.unindexed_names = []
+
+    @property
+    def live(self):
+        return self.rows[:self.size]
+
+    def add_item(self, name, price, quantity, category='General'):
+        if price <= 0 or quantity < 0:
+            print("Invalid Price or Quantity. Price must to be greater than 0 and quantity must to be a positive number")
+            return
+        Item.item_counter += 1
+        item_id = Item.item_counter
+        self._append(item_id, name, price, quantity, category)
+        print(f"Item added successfully with Item ID : {item_id}")
+        return item_id
+
+    def update_item_price(self, item_id, new_price):
+        row = self.row_of.get(item_id)
+        if row is None:
+            print("Item not found")
+        elif new_price > 0:
+            self.rows['price'][row] = new_price
+            print(f"Price updated to : {new_price}")
+        else:
+            print("Invalid price. Price must to be greater than 0")
+
+    def update_item_quantity(self, item_id, new_quantity):
+        row = self.row_of.get(item_id)
+        if row is None:
+            print("Item not found")
+        elif new_quantity >= 0:
+            self.rows['quantity'][row] = new_quantity
+            print(f"Quantity updated to : {new_quantity}")
+        else:
+            print("Invalid quantity. Quantity must to be a positive number")
+
+    def view_item(self, item_id):
+        item = self.get_item_by_id(item_id)
+        if item:
+            print(item)
+        else:
+            print("Item not found")
+
+    def delete_item(self, item_id):
+        row = self.row_of.pop(item_id, None)
+        if row is None:
+            print("Item not found")
+            return
+        last = self.size - 1
+        if row != last:
+            self.rows[row] = self.rows[last]
+            self.row_of[int(self.rows['item_id'][row])] = row
+        self.size -= 1
+        #an item that was never indexed is just skipped once the index is built, see _index_names
+        if item_id in self.name_index.names:
+            self.name_index.remove(item_id)
+        #names of deleted rows stay in the table, squeeze them out once they outnumber the live ones
+        dead_names = len(self.names) - self.size
+        if dead_names > 1024 and dead_names > self.size:
+            self._compact_names()
+        print(f"Item with ID {item_id} deleted.")
+
+    def view_all_items(self, sort_by=None, limit=None, offset=0, descending=False, after=None):
+        #same pages and cursors as Inventory.view_all_items
+        rows = self.live
+        item_ids = rows['item_id']
+        sorted_by_key = sort_by in ('price', 'quantity')
+        #ties in id order, like the sorted indexes of Inventory; negating flips both for descending
+        sign = -1 if descending else 1
+        keys = sign * (rows[sort_by] if sorted_by_key else item_ids)
+        signed_ids = sign * item_ids
+        candidates = np.arange(self.size)
+        if after is not None:
+            after_key, after_id = after if sorted_by_key else (after, after)
+            after_key, after_id = sign * after_key, sign * after_id
+            candidates = np.flatnonzero((keys > after_key) | ((keys == after_key) & (signed_ids > after_id)))
+        count = len(candidates) if limit is None else min(offset + limit + 1, len(candidates))
+        if 0 < count < len(candidates):
+            #only the first count rows are needed: partition around the count-th key, sort what falls below it
+            threshold = np.partition(keys[candidates], count - 1)[count - 1]
+            candidates = candidates[keys[candidates] <= threshold]
+        order = candidates[np.lexsort((signed_ids[candidates], keys[candidates]))][offset:count]
+
+        cursor = None
+        if limit is not None and len(order) > limit:
+            #one extra row was fetched only to know there is a next page
+            cursor = after
+            if limit:
+                last = self.rows[order[limit - 1]]
+                cursor = (last[sort_by].item(), last['item_id'].item()) if sorted_by_key else last['item_id'].item()
+            order = order[:limit]
+        items_list = [self._item_at(row) for row in order.tolist()]
+
+        if items_list:
+            for item in items_list:
+                print(item)
+        elif not self.size:
+            print("No items in inventory.")
+        return items_list, cursor
+
+    def calculate_inventory_value(self):
+        rows = self.live
+        values = rows['price'] * rows['quantity']
+        total_value = float(values.sum())
+        print(f"Total inventory value: ₹{total_value}")
+        per_category = np.bincount(rows['category'], weights=values, minlength=len(self.categories))
+        present = np.bincount(rows['category'], minlength=len(self.categories)) > 0
+        for code in sorted(np.flatnonzero(present).tolist(), key=lambda code: self.categories[code]):
+            print(f"  {self.categories[code]}: ₹{float(per_category[code])}")
+        return total_value
+
+    def calculate_category_value(self, category):
+        code = self.categories.codes.get(category)
+        if code is None:
+            return 0
+        rows = self.live
+        in_category = rows['category'] == code
+        return float(np.dot(rows['price'][in_category], rows['quantity'][in_category]))
+
+    def low_stock_items(self, threshold):
+        rows = self.live
+        matches = np.flatnonzero(rows['quantity'] < threshold)
+        order = matches[np.lexsort((rows['item_id'][matches], rows['quantity'][matches]))]
+        return [self._item_at(row) for row in order.tolist()]
+
+    def items_in_price_range(self, low, high):
+        rows = self.live
+        matches = np.flatnonzero((rows['price'] >= low) & (rows['price'] <= high))
+        order = matches[np.lexsort((rows['item_id'][matches], rows['price'][matches]))]
+        return [self._item_at(row) for row in order.tolist()]
+
+    def search_item_by_name(self, name):
+        self._index_names()
+        results = [self.get_item_by_id(item_id) for item_id in self.name_index.search(name)]
+        if results:
+            for item in results:
+                print(item)
+        else:
+            print("No items found with that name.")
+
+    def search_item_by_id(self, item_id):
+        item = self.get_item_by_id(item_id)
+        if item:
+            print(item)
+        else:
+            print("Item not found.")
+
+    def get_item_by_id(self, item_id):
+        #a detached Item built from the row, updates have to go through the inventory
+        row = self.row_of.get(item_id)
+        return None if row is None else self._item_at(row)
+
+    def import_csv(self, path, chunk_size=100_000):
+        #streams the file in chunks; each chunk is validated with the add_item rules and
+        #appended with whole-column writes. Returns (imported, rejected)
+        from inventory_io import gc_paused, read_csv_chunks
+
+        imported = rejected = 0
+        with gc_paused():
+            for chunk in read_csv_chunks(path, chunk_size):
+                valid = chunk.valid_mask()
+                if chunk.item_ids is not None:
+                    #ids must be positive, new, and not repeated inside the chunk
+                    _, first = np.unique(chunk.item_ids, return_index=True)
+                    unique = np.zeros(len(chunk), dtype=bool)
+                    unique[first] = True
+                    known = np.fromiter((item_id in self.row_of for item_id in chunk.item_ids.tolist()), dtype=bool, count=len(chunk))
+                    valid &= (chunk.item_ids > 0) & unique & ~known
+                rows = np.flatnonzero(valid)
+                if chunk.item_ids is not None:
+                    item_ids = chunk.item_ids[rows]
+                else:
+                    item_ids = np.arange(Item.item_counter + 1, Item.item_counter + 1 + len(rows))
+                rows_list = rows.tolist()
+                self._append_many(item_ids, list(map(chunk.names.__getitem__, rows_list)), chunk.prices[rows],
+                                  chunk.quantities[rows], list(map(chunk.categories.__getitem__, rows_list)))
+                imported += len(rows)
+                rejected += len(chunk) - len(rows)
+        print(f"Imported {imported} items, rejected {rejected} invalid rows.")
+        return imported, rejected
+
+    def export_csv(self, path, chunk_size=100_000):
+        from inventory_io import write_csv
+
+        def chunks():
+            for start in range(0, self.size, chunk_size):
+                rows = self.rows[start:min(start + chunk_size, self.size)]
+                yield (rows['item_id'].tolist(), [self.names[code] for code in rows['name'].tolist()],
+                       rows['price'].tolist(), rows['quantity'].tolist(),
+                       [self.categories[code] for code in rows['category'].tolist()])
+
+        write_csv(path, chunks())
+        print(f"Exported {self.size} items to {path}.")
+
+    def save_snapshot(self, path, chunk_size=100_000):
+        from inventory_io import write_snapshot
+
+        #only the names of live rows go to disk
+        if len(self.names) > self.size:
+            self._compact_names()
+        chunks = (self.rows[start:min(start + chunk_size, self.size)] for start in range(0, self.size, chunk_size))
+        write_snapshot(path, Item.item_counter, self.names, self.categories, chunks)
+
+    def load_snapshot(self, path, chunk_size=100_000):
+        #replaces the current contents with the snapshot, as Inventory.load_snapshot does
+        from inventory_io import gc_paused, read_snapshot
+
+        with gc_paused():
+            item_counter, names, categories, row_chunks = read_snapshot(path, chunk_size)
+            self.rows = np.zeros(1024, dtype=ROW_DTYPE)
+            self.size = 0
+            self.row_of = {}
+            self.names = names
+            self.categories = categories
+            self.name_index = NameIndex()
+            self.unindexed_names = []
+            for rows in row_chunks:
+                self._reserve(len(rows))
+                self.rows[self.size:self.size + len(rows)] = rows
+                item_ids = rows['item_id'].tolist()
+                self.row_of.update(zip(item_ids, range(self.size, self.size + len(rows))))
+                self.unindexed_names.extend(zip(item_ids, [names[code] for code in rows['name'].tolist()]))
+                self.size += len(rows)
+        Item.item_counter = max(Item.item_counter, item_counter)
+
+    def _append_many(self, item_ids, names, prices, quantities, categories):
+        count = len(item_ids)
+        if not count:
+            return
+        self._reserve(count)
+        rows = self.rows[self.size:self.size + count]
+        rows['item_id'] = item_ids
+        rows['price'] = prices
+        rows['quantity'] = quantities
+        rows['name'] = self.names.codes_of(names)
+        rows['category'] = self.categories.codes_of(categories)
+        item_ids = item_ids.tolist()
+        self.row_of.update(zip(item_ids, range(self.size, self.size + count)))
+        self.unindexed_names.extend(zip(item_ids, names))
+        self.size += count
+        Item.item_counter = max(Item.item_counter, max(item_ids))
+
+    def _reserve(self, count):
+        if self.size + count > len(self.rows):
+            grown = np.zeros(max(2 * len(self.rows), self.size + count), dtype=ROW_DTYPE)
+            grown[:self.size] = self.rows[:self.size]
+            self.rows = grown
+
+    def _index_names(self):
+        #newest first, so an id that was deleted and added again gets its latest name;
+        #ids deleted before they were ever indexed are skipped
+        names = self.name_index.names
+        for item_id, name in reversed(self.unindexed_names):
+            if item_id in self.row_of and item_id not in names:
+                self.name_index.add(item_id, name)
+        self.unindexed_names = []
+
+    def _compact_names(self):
+        #names are not deduplicated, so every live row has a name of its own: renumber them in row order
+        live_names = self.rows['name'][:self.size].tolist()
+        strings = self.names.strings
+        self.names.strings = [strings[code] for code in live_names]
+        self.rows['name'][:self.size] = np.arange(self.size)
+
+    def _append(self, item_id, name, price, quantity, category):
+        self._reserve(1)
+        row = self.size
+        self.rows[row] = (item_id, price, quantity, self.names.code(name), self.categories.code(category))
+        self.row_of[item_id] = row
+        self.size += 1
+        self.unindexed_names.append((item_id, name))
+
+    def _item_at(self, row):
+        item_id, price, quantity, name, category = self.rows[row].tolist()
+        return Item(self.names[name], price, quantity, self.categories[category], item_id)
@@ -0,0 +1,165 @@
+#Streaming import/export for both inventory engines: CSV files and a compact binary snapshot.
+#Everything works in chunks of chunk_size rows, so memory stays bounded however big the file is
+
+import csv
+import gc
+from contextlib import contextmanager
+from itertools import islice
+
+import numpy as np
+
+from columnar_inventory import ROW_DTYPE, StringTable
+
+CSV_FIELDS = ['item_id', 'name', 'price', 'quantity', 'category']
+SNAPSHOT_MAGIC = b'INVSNAP1'
+#magic, item count, Item.item_counter, name count, category count
+SNAPSHOT_HEADER = np.dtype([('magic', 'S8'), ('count', '<i8'), ('item_counter', '<i8'),
+                            ('names', '<i8'), ('categories', '<i8')])
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+@contextmanager
+def gc_paused():
+    #bulk loads allocate millions of short-lived row lists and no reference cycles; letting the
+    #cyclic collector rescan the growing heap over and over roughly doubles the load time
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class CsvChunk:
+    #one chunk of parsed rows; item_ids is None when the file has no item_id column
+    def __init__(self, item_ids, names, prices, quantities, categories):
+        self.item_ids = item_ids
+        self.names = names
+        self.prices = prices
+        self.quantities = quantities
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.names)
+
+    def valid_mask(self):
+        #the add_item rules, price > 0 and quantity >= 0, plus rows that didn't parse
+        return np.isfinite(self.prices) & (self.prices > 0) & (self.quantities >= 0)
+
+
+def read_csv_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = {field: i for i, field in enumerate(header)}
+        missing = {'name', 'price', 'quantity'} - set(columns)
+        if missing:
+            raise ValueError(f"{path} is missing the column(s): {', '.join(sorted(missing))}")
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+            yield _parse_chunk(rows, columns)
+
+
+def _parse_chunk(rows, columns):
+    #transpose once, then convert whole columns at a time
+    width = len(columns)
+    if set(map(len, rows)) != {width}:
+        #pad or cut ragged rows, their missing values fail validation
+        rows = [row if len(row) == width else (row + [''] * width)[:width] for row in rows]
+    fields = list(zip(*rows))
+    item_ids = None
+    if 'item_id' in columns:
+        item_ids = _to_numbers(fields[columns['item_id']], np.int64, -1)
+    if 'category' in columns:
+        categories = [category or 'General' for category in fields[columns['category']]]
+    else:
+        categories = ['General'] * len(rows)
+    return CsvChunk(item_ids,
+                    list(fields[columns['name']]),
+                    _to_numbers(fields[columns['price']], np.float64, np.nan),
+                    _to_numbers(fields[columns['quantity']], np.int64, -1),
+                    categories)
+
+
+def _to_numbers(values, dtype, bad):
+    #whole-column conversion; only a chunk with a malformed value is converted value by value
+    parse = float if dtype is np.float64 else int
+    try:
+        return np.fromiter(map(parse, values), dtype=dtype, count=len(values))
+    except ValueError:
+        converted = np.full(len(values), bad, dtype=dtype)
+        for i, value in enumerate(values):
+            try:
+                converted[i] = parse(value)
+            except ValueError:
+                pass
+        return converted
+
+
+def write_csv(path, chunks):
+    #chunks yields (item_ids, names, prices, quantities, categories) column lists
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+        for item_ids, names, prices, quantities, categories in chunks:
+            writer.writerows(zip(item_ids, names, prices, quantities, categories))
+
+
+def write_snapshot(path, item_counter, names, categories, row_chunks):
+    #row_chunks yields ROW_DTYPE arrays whose name/category codes refer to names/categories;
+    #the tables are written after the rows because they are only complete once every row is seen
+    count = 0
+    with open(path, 'wb') as f:
+        f.write(np.zeros(1, dtype=SNAPSHOT_HEADER).tobytes())
+        for rows in row_chunks:
+            f.write(rows.astype(ROW_DTYPE, copy=False).tobytes())
+            count += len(rows)
+        _write_strings(f, names.strings)
+        _write_strings(f, categories.strings)
+        f.seek(0)
+        header = np.array([(SNAPSHOT_MAGIC, count, item_counter, len(names), len(categories))], dtype=SNAPSHOT_HEADER)
+        f.write(header.tobytes())
+
+
+def read_snapshot(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    #returns (item_counter, names, categories, row chunk generator)
+    with open(path, 'rb') as f:
+        header = np.frombuffer(f.read(SNAPSHOT_HEADER.itemsize), dtype=SNAPSHOT_HEADER)[0]
+        if header['magic'] != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not an inventory snapshot")
+        count = int(header['count'])
+        f.seek(SNAPSHOT_HEADER.itemsize + count * ROW_DTYPE.itemsize)
+        names = _read_strings(f, int(header['names']), dedupe=False)
+        categories = _read_strings(f, int(header['categories']))
+
+    def row_chunks():
+        with open(path, 'rb') as f:
+            f.seek(SNAPSHOT_HEADER.itemsize)
+            remaining = count
+            while remaining:
+                rows = np.fromfile(f, dtype=ROW_DTYPE, count=min(chunk_size, remaining))
+                remaining -= len(rows)
+                yield rows
+
+    return int(header['item_counter']), names, categories, row_chunks()
+
+
+def _write_strings(f, strings):
+    encoded = [string.encode('utf-8') for string in strings]
+    f.write(np.array([len(data) for data in encoded], dtype='<i4').tobytes())
+    f.write(b''.join(encoded))
+
+
+def _read_strings(f, count, dedupe=True):
+    lengths = np.frombuffer(f.read(4 * count), dtype='<i4')
+    data = f.read(int(lengths.sum()))
+    ends = np.cumsum(lengths).tolist()
+    starts = [0] + ends[:-1]
+    table = StringTable(dedupe)
+    table.codes_of([data[start:end].decode('utf-8') for start, end in zip(starts, ends)])
+    return table
@@ -1,56 +1,200 @@
 #An Inventory Management System
 
+import heapq
+import math
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain, islice
+
 class Item:
     #starting ID for items
     item_counter = 1000
     
-    def __init__(self, name, price, quantity):
-        Item.item_counter += 1
-        self.item_id = Item.item_counter
+    def __init__(self, name, price, quantity, category='General', item_id=None):
+        #item_id is only given when rebuilding an item that already has one
+        if item_id is None:
+            Item.item_counter += 1
+            item_id = Item.item_counter
+        self.item_id = item_id
         self.name = name
         self.price = price
         self.quantity = quantity
+        self.category = category
         
     def update_price(self, new_price):
         if new_price > 0:
             self.price = new_price
             print(f"Price updated to : {self.price}")
+            return True
         else:
             print("Invalid price. Price must to be greater than 0")
+            return False
     
     def update_quantity(self, new_quantity):
         if new_quantity >= 0:
-            self.price = new_quantity
+            self.quantity = new_quantity
             print(f"Quantity updated to : {self.quantity}")
+            return True
         else:
             print("Invalid quantity. Quantity must to be a positive number")
+            return False
         
     def __str__(self):
-        return f"ID: {self.item_id}, Name: {self.name}, Price: {self.price}, Quantity: {self.quantity}"
+        return f"ID: {self.item_id}, Name: {self.name}, Category: {self.category}, Price: {self.price}, Quantity: {self.quantity}"
+
+class SortedIndex:
+    #sorted list of (key, item_id) pairs split into buckets of a few hundred entries,
+    #so inserts and deletes only shift one small bucket instead of the whole list
+    bucket_size = 512
+
+    def __init__(self):
+        self.buckets = []
+        #last entry of each bucket, to find the right bucket by bisection
+        self.maxes = []
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return chain.from_iterable(self.buckets)
+
+    def add(self, entry):
+        self.size += 1
+        if not self.buckets:
+            self.buckets.append([entry])
+            self.maxes.append(entry)
+            return
+        i = min(bisect_left(self.maxes, entry), len(self.buckets) - 1)
+        bucket = self.buckets[i]
+        insort(bucket, entry)
+        self.maxes[i] = bucket[-1]
+        if len(bucket) > 2 * self.bucket_size:
+            self.buckets[i:i + 1] = [bucket[:self.bucket_size], bucket[self.bucket_size:]]
+            self.maxes[i:i + 1] = [bucket[self.bucket_size - 1], bucket[-1]]
+
+    def irange(self, after=None, reverse=False, skip=0):
+        #entries strictly after `after` (strictly before it when reverse), dropping the first `skip`
+        #whole buckets are skipped by their length, so a deep page never walks the entries before it
+        buckets = self.buckets
+        if reverse:
+            i, stop = len(buckets) - 1, None
+            if after is not None and bisect_left(self.maxes, after) < len(buckets):
+                i = bisect_left(self.maxes, after)
+                stop = bisect_left(buckets[i], after)
+            parts = chain([buckets[i][:stop]] if i >= 0 else [], (buckets[k] for k in range(i - 1, -1, -1)))
+        else:
+            i, start = 0, 0
+            if after is not None:
+                i = bisect_right(self.maxes, after)
+                start = bisect_right(buckets[i], after) if i < len(buckets) else 0
+            parts = chain([buckets[i][start:]] if i < len(buckets) else [], islice(buckets, i + 1, None))
+        for part in parts:
+            if skip >= len(part):
+                skip -= len(part)
+                continue
+            yield from reversed(part[:len(part) - skip]) if reverse else part[skip:]
+            skip = 0
+
+    def remove(self, entry):
+        i = bisect_left(self.maxes, entry)
+        bucket = self.buckets[i]
+        del bucket[bisect_left(bucket, entry)]
+        self.size -= 1
+        if bucket:
+            self.maxes[i] = bucket[-1]
+        else:
+            del self.buckets[i]
+            del self.maxes[i]
+
+
+class NameIndex:
+    #trigram index for case-insensitive substring search on item names
+    def __init__(self):
+        self.trigrams = {}
+        self.names = {}
+        #names shorter than 3 characters have no trigrams, they are kept aside
+        self.short_names = {}
+
+    @staticmethod
+    def trigrams_of(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, item_id, name):
+        name = name.lower()
+        self.names[item_id] = name
+        if len(name) < 3:
+            self.short_names[item_id] = name
+        for trigram in self.trigrams_of(name):
+            self.trigrams.setdefault(trigram, set()).add(item_id)
+
+    def remove(self, item_id):
+        name = self.names.pop(item_id)
+        self.short_names.pop(item_id, None)
+        for trigram in self.trigrams_of(name):
+            ids = self.trigrams[trigram]
+            ids.discard(item_id)
+            if not ids:
+                del self.trigrams[trigram]
+
+    def search(self, text):
+        #ids of the items whose name contains text, in id order
+        text = text.lower()
+        if len(text) >= 3:
+            postings = sorted((self.trigrams.get(trigram, set()) for trigram in self.trigrams_of(text)), key=len)
+            candidates = set(postings[0])
+            for ids in postings[1:]:
+                candidates &= ids
+            #all trigrams present doesn't mean they are adjacent, check the real substring
+            matches = [item_id for item_id in candidates if text in self.names[item_id]]
+        else:
+            #every longer match has a trigram containing text, scan the trigrams instead of the items
+            matches = set()
+            for trigram, ids in self.trigrams.items():
+                if text in trigram:
+                    matches |= ids
+            matches.update(item_id for item_id, name in self.short_names.items() if text in name)
+        return sorted(matches)
+
 
 class Inventory:
     def __init__(self):
         self.items = {}
+        self.name_index = NameIndex()
+        self.price_index = SortedIndex()
+        self.quantity_index = SortedIndex()
+        #running valuation, kept up to date by every change so reading it is O(1)
+        self.total_value = 0
+        self.category_values = {}
+        self.category_counts = {}
     
-    def add_item(self, name, price, quantity):
+    def add_item(self, name, price, quantity, category='General'):
         if price <= 0 or quantity < 0:
             print("Invalid Price or Quantity. Price must to be greater than 0 and quantity must to be a positive number")
             return
-        item = Item(name, price, quantity)
-        self.items[item.item_id] = item
+        item = Item(name, price, quantity, category)
+        self._insert(item)
         print(f"Item added successfully with Item ID : {item.item_id}")
+        return item.item_id
         
     def update_item_price(self, item_id, new_price):
         item = self.get_item_by_id(item_id)
         if item:
-            item.update_price(new_price)
+            old_price = item.price
+            if item.update_price(new_price):
+                self._add_value(item, (new_price - old_price) * item.quantity)
+                self.price_index.remove((old_price, item_id))
+                self.price_index.add((new_price, item_id))
         else:
             print("Item not found")
             
     def update_item_quantity(self, item_id, new_quantity):
         item = self.get_item_by_id(item_id)
         if item:
-            item.update_quantity(new_quantity)
+            old_quantity = item.quantity
+            if item.update_quantity(new_quantity):
+                self._add_value(item, item.price * (new_quantity - old_quantity))
+                self.quantity_index.remove((old_quantity, item_id))
+                self.quantity_index.add((new_quantity, item_id))
         else:
             print("Item not found")
     
@@ -62,36 +206,104 @@ class Inventory:
             print("Item not found")
     def delete_item(self, item_id):
         if item_id in self.items:
-            del self.items[item_id]
+            item = self.items.pop(item_id)
+            self._add_value(item, -item.price * item.quantity)
+            self.category_counts[item.category] -= 1
+            if not self.category_counts[item.category]:
+                #last item of the category, drop it instead of keeping a rounding leftover
+                del self.category_counts[item.category]
+                del self.category_values[item.category]
+            self.name_index.remove(item_id)
+            self.price_index.remove((item.price, item_id))
+            self.quantity_index.remove((item.quantity, item_id))
             print(f"Item with ID {item_id} deleted.")
         else:
             print("Item not found")
             
-    def view_all_items(self, sort_by=None):
-        items_list = list(self.items.values())
-        if sort_by == 'price':
-            items_list.sort(key=lambda x: x.price)
-        elif sort_by == 'quantity':
-            items_list.sort(key=lambda x: x.quantity)
-            
+    def view_all_items(self, sort_by=None, limit=None, offset=0, descending=False, after=None):
+        #prints and returns one page as (items, cursor); items are in id order unless sorted by price or quantity
+        #cursor is None on the last page, otherwise pass it back as after= to get the page that follows
+        end = None if limit is None else limit + 1
+        if sort_by in ('price', 'quantity'):
+            #the sorted indexes are already in order, just seek to the page
+            index = self.price_index if sort_by == 'price' else self.quantity_index
+            entries = list(islice(index.irange(after, descending, offset), end))
+            item_ids = [item_id for _, item_id in entries]
+        else:
+            #nothing keeps the ids sorted, a heap picks the first offset + limit of them without sorting the rest
+            item_ids = self.items.keys()
+            if after is not None:
+                item_ids = [item_id for item_id in item_ids if (item_id < after if descending else item_id > after)]
+            if limit is None:
+                entries = sorted(item_ids, reverse=descending)[offset:]
+            else:
+                select = heapq.nlargest if descending else heapq.nsmallest
+                entries = select(offset + limit + 1, item_ids)[offset:]
+            item_ids = entries
+
+        cursor = None
+        if limit is not None and len(entries) > limit:
+            #one extra entry was fetched only to know there is a next page
+            cursor = entries[limit - 1] if limit else after
+            item_ids = item_ids[:limit]
+        items_list = [self.items[item_id] for item_id in item_ids]
+
         if items_list:
             for item in items_list:
                 print(item)
-        else:
+        elif not self.items:
             print("No items in inventory.")
-        
+        return items_list, cursor
+
     def calculate_inventory_value(self):
-        total_value = sum(item.price * item.quantity for item in self.items.values())
-        print(f"Total inventory value: ₹{total_value}")
+        print(f"Total inventory value: ₹{self.total_value}")
+        for category, value in sorted(self.category_values.items()):
+            print(f"  {category}: ₹{value}")
+        return self.total_value
+
+    def calculate_category_value(self, category):
+        return self.category_values.get(category, 0)
+
+    def verify_inventory_value(self):
+        #recompute everything from scratch and compare with the running totals
+        #the running totals add and subtract floats, so allow for rounding drift
+        total_value = 0
+        category_values = {}
+        for item in self.items.values():
+            value = item.price * item.quantity
+            total_value += value
+            category_values[item.category] = category_values.get(item.category, 0) + value
+        consistent = math.isclose(total_value, self.total_value, rel_tol=1e-9, abs_tol=1e-6) and \
+            set(category_values) == set(self.category_values) and \
+            all(math.isclose(value, self.category_values[category], rel_tol=1e-9, abs_tol=1e-6)
+                for category, value in category_values.items())
+        if not consistent:
+            print(f"Inventory value out of sync: running total ₹{self.total_value}, recomputed ₹{total_value}. Resynced.")
+            self.total_value = total_value
+            self.category_values = category_values
+        return consistent
+
+    def _add_value(self, item, delta):
+        self.total_value += delta
+        self.category_values[item.category] = self.category_values.get(item.category, 0) + delta
     
     def search_item_by_name(self, name):
-        results = [item for item in self.items.values() if name.lower() in item.name.lower()]
+        results = [self.items[item_id] for item_id in self.name_index.search(name)]
         if results:
             for item in results:
                 print(item)
         else:
             print("No items found with that name.")
     
+    def low_stock_items(self, threshold):
+        #items with quantity below threshold, lowest first, straight from the quantity index
+        results = []
+        for quantity, item_id in self.quantity_index:
+            if quantity >= threshold:
+                break
+            results.append(self.items[item_id])
+        return results
+
     def search_item_by_id(self, item_id):
         item = self.get_item_by_id(item_id)
         if item:
@@ -102,6 +314,91 @@ class Inventory:
     def get_item_by_id(self, item_id):
         return self.items.get(item_id)
 
+    def import_csv(self, path, chunk_size=100_000):
+        #streams the file in chunks, validating each chunk with the add_item rules
+        #returns (imported, rejected); rows keep their item_id if the file has that column
+        from inventory_io import gc_paused, read_csv_chunks
+
+        imported = rejected = 0
+        with gc_paused():
+            for chunk in read_csv_chunks(path, chunk_size):
+                valid = chunk.valid_mask()
+                item_ids = chunk.item_ids.tolist() if chunk.item_ids is not None else None
+                prices = chunk.prices.tolist()
+                quantities = chunk.quantities.tolist()
+                for row in valid.nonzero()[0].tolist():
+                    item_id = item_ids[row] if item_ids else None
+                    if item_id is not None and (item_id <= 0 or item_id in self.items):
+                        rejected += 1
+                        continue
+                    self._insert(Item(chunk.names[row], prices[row], quantities[row], chunk.categories[row], item_id))
+                    imported += 1
+                rejected += len(chunk) - int(valid.sum())
+        print(f"Imported {imported} items, rejected {rejected} invalid rows.")
+        return imported, rejected
+
+    def export_csv(self, path, chunk_size=100_000):
+        from inventory_io import write_csv
+
+        def chunks():
+            items = iter(self.items.values())
+            while True:
+                batch = [item for _, item in zip(range(chunk_size), items)]
+                if not batch:
+                    return
+                yield ([item.item_id for item in batch], [item.name for item in batch], [item.price for item in batch],
+                       [item.quantity for item in batch], [item.category for item in batch])
+
+        write_csv(path, chunks())
+        print(f"Exported {len(self.items)} items to {path}.")
+
+    def save_snapshot(self, path, chunk_size=100_000):
+        import numpy as np
+        from inventory_io import write_snapshot
+        from columnar_inventory import ROW_DTYPE, StringTable
+
+        names = StringTable(dedupe=False)
+        categories = StringTable()
+
+        def row_chunks():
+            items = iter(self.items.values())
+            while True:
+                batch = [(item.item_id, item.price, item.quantity, names.code(item.name), categories.code(item.category))
+                         for _, item in zip(range(chunk_size), items)]
+                if not batch:
+                    return
+                yield np.array(batch, dtype=ROW_DTYPE)
+
+        write_snapshot(path, Item.item_counter, names, categories, row_chunks())
+
+    def load_snapshot(self, path, chunk_size=100_000):
+        #replaces the current contents with the snapshot, as ColumnarInventory.load_snapshot does
+        from inventory_io import gc_paused, read_snapshot
+
+        with gc_paused():
+            item_counter, names, categories, row_chunks = read_snapshot(path, chunk_size)
+            self.items = {}
+            self.name_index = NameIndex()
+            self.price_index = SortedIndex()
+            self.quantity_index = SortedIndex()
+            self.total_value = 0
+            self.category_values = {}
+            self.category_counts = {}
+            for rows in row_chunks:
+                for item_id, price, quantity, name, category in rows.tolist():
+                    self._insert(Item(names[name], price, quantity, categories[category], item_id))
+        Item.item_counter = max(Item.item_counter, item_counter)
+
+    def _insert(self, item):
+        #adds an already validated item and keeps every index and total in step
+        self.items[item.item_id] = item
+        Item.item_counter = max(Item.item_counter, item.item_id)
+        self.category_counts[item.category] = self.category_counts.get(item.category, 0) + 1
+        self._add_value(item, item.price * item.quantity)
+        self.name_index.add(item.item_id, item.name)
+        self.price_index.add((item.price, item.item_id))
+        self.quantity_index.add((item.quantity, item.item_id))
+
 def main():
     inventory = Inventory()
 
@@ -116,7 +413,8 @@ def main():
             name = input("Enter item name: ")
             price = float(input("Enter item price: "))
             quantity = int(input("Enter item quantity: "))
-            inventory.add_item(name, price, quantity)
+            category = input("Enter item category (or press Enter for General): ").strip() or 'General'
+            inventory.add_item(name, price, quantity, category)
 
         elif choice == '2':
             sub_choice = input("Choose option (a for price, b for quantity): ").strip().lower()
@@ -144,7 +442,11 @@ def main():
                 sort_by = "price"
             elif sub_choice == 'b':
                 sort_by = "quantity"
-            inventory.view_all_items(sort_by)
+            limit = input("Items per page (or press Enter for all): ").strip()
+            limit = int(limit) if limit else None
+            items_list, cursor = inventory.view_all_items(sort_by, limit)
+            while cursor is not None and input("Show next page? (y/n): ").strip().lower() == 'y':
+                items_list, cursor = inventory.view_all_items(sort_by, limit, after=cursor)
 
         elif choice == '6':
             inventory.calculate_inventory_value()
@@ -0,0 +1,120 @@
+#Class-wide grade statistics for the Gradebook, computed with NumPy
+
+from itertools import chain
+
+import numpy as np
+
+#percentiles reported for every subject, 50 is the median
+PERCENTILES = (25, 50, 75, 90)
+#CGPA buckets 0-1, 1-2, ... 9-10, the last one includes 10
+CGPA_BINS = np.arange(11)
+
+
+def subject_stats(conn, subjects):
+    #subject -> statistics for each of subjects that still has grades
+    #the grades come already sorted from the (subject, grade) index, then every statistic
+    #is worked out for all the subjects at once over the concatenated runs
+    runs = [np.fromiter(chain.from_iterable(conn.execute(
+                "SELECT grade FROM grades WHERE subject = ? ORDER BY grade", (subject,))), dtype=np.float64)
+            for subject in subjects]
+    subjects = [subject for subject, run in zip(subjects, runs) if len(run)]
+    runs = [run for run in runs if len(run)]
+    if not runs:
+        return {}
+    grades = np.concatenate(runs)
+    counts = np.array([len(run) for run in runs])
+    starts = np.cumsum(counts) - counts
+    means = np.add.reduceat(grades, starts) / counts
+    #linear interpolation between the two closest ranks, the same as np.percentile
+    percentiles = {}
+    for p in PERCENTILES:
+        position = (counts - 1) * (p / 100)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, counts - 1)
+        below, above = grades[starts + low], grades[starts + high]
+        percentiles[p] = below + (above - below) * (position - low)
+
+    stats = {}
+    for i, subject in enumerate(subjects):
+        stats[subject] = {
+            'count': int(counts[i]),
+            'mean': float(means[i]),
+            'median': float(percentiles[50][i]),
+            'percentiles': {p: float(values[i]) for p, values in percentiles.items()},
+            'grades': runs[i],
+        }
+    return stats
+
+
+def student_stats(conn):
+    #every student's average over their subjects in one grouped pass; students without grades are left out
+    rows = conn.execute("SELECT student, SUM(grade), COUNT(grade) FROM grades GROUP BY student").fetchall()
+    names = [row[0] for row in rows]
+    sums = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+    counts = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+    return _student_stats(names, sums / counts if len(rows) else sums)
+
+
+def refresh_student_stats(conn, stats, names):
+    #re-reads only the given students and patches their averages into stats
+    row_of, averages = stats['row_of'], stats['averages']
+    removed, added_names, added = [], [], []
+    for name in names:
+        total, count = conn.execute("SELECT SUM(grade), COUNT(grade) FROM grades WHERE student = ?", (name,)).fetchone()
+        i = row_of.get(name)
+        if count and i is not None:
+            averages[i] = total / count
+        elif count:
+            added_names.append(name)
+            added.append(total / count)
+        elif i is not None:
+            removed.append(i)
+    names = stats['names']
+    if removed:
+        keep = np.ones(len(averages), dtype=bool)
+        keep[removed] = False
+        averages = averages[keep]
+        names = [name for name, kept in zip(names, keep.tolist()) if kept]
+    if added:
+        averages = np.concatenate([averages, added])
+        names = names + added_names
+    if removed or added:
+        return _student_stats(names, averages)
+    stats['sorted_averages'] = np.sort(averages)
+    return stats
+
+
+def _student_stats(names, averages):
+    return {
+        'names': names,
+        'row_of': {name: i for i, name in enumerate(names)},
+        'averages': averages,
+        'sorted_averages': np.sort(averages),
+    }
+
+
+def percentile_rank(sorted_values, value):
+    #share of the class strictly below value, in percent
+    if not len(sorted_values):
+        return None
+    return float(np.searchsorted(sorted_values, value, side='left') / len(sorted_values) * 100)
+
+
+def cgpa_distribution(stats):
+    #[(low, high, number of students)] for each CGPA bucket
+    counts, edges = np.histogram(stats['averages'] / 10, bins=CGPA_BINS)
+    return [(int(low), int(high), int(count)) for low, high, count in zip(edges[:-1], edges[1:], counts)]
+
+
+def top_students(stats, n):
+    #[(name, average)] of the n best averages, ties by name, without sorting the whole class
+    averages, names = stats['averages'], stats['names']
+    if n <= 0 or not len(averages):
+        return []
+    if n < len(averages):
+        threshold = np.partition(averages, len(averages) - n)[len(averages) - n]
+        candidates = np.flatnonzero(averages >= threshold)
+    else:
+        candidates = np.arange(len(averages))
+    best = sorted(candidates.tolist(), key=lambda i: (-averages[i], names[i]))[:n]
+    return [(names[i], float(averages[i])) for i in best]
@@ -1,69 +1,274 @@
 #Student Gradebook System with File Handling
 
 import os
+import csv
 import json
+import sqlite3
+from itertools import islice
 
 class Gradebook:
     def __init__(self, filename):
+        #one row per (student, subject), so a change only rewrites the rows it touches
+        #nothing is read up front, every lookup goes to the database for just that student
         self.filename = filename
-        self.gradebook = self.load_gradebook()
-        
-    def load_gradebook(self):
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r') as f:
-                return json.load()
-        else:
-            return {}
-        
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        #64 MB of page cache keeps the indexes of a large class in memory during bulk writes
+        self.conn.execute("PRAGMA cache_size=-65536")
+        self.create_tables()
+        #class analytics cache: statistics per subject, plus those over every student's average
+        #a change only marks the subjects and the student it touched; None means nothing is cached yet
+        self.subject_stats = None
+        self.stale_subjects = set()
+        self.student_stats = None
+        self.stale_students = set()
+
+    def create_tables(self):
+        #students is kept apart from grades so a student without any grades still exists
+        self.conn.execute("CREATE TABLE IF NOT EXISTS students (name TEXT PRIMARY KEY)")
+        #rowid order is the order the grades were entered in, which is how they are shown
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS grades (
+                student TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                grade INTEGER NOT NULL,
+                UNIQUE (student, subject)
+            )
+        """)
+        #hands the analytics each subject's grades already sorted
+        self.conn.execute("CREATE INDEX IF NOT EXISTS grades_by_subject ON grades (subject, grade)")
+        self.conn.commit()
+
+    def import_json(self, filename):
+        #one-off migration from the old gradebook.json format
+        with open(filename, 'r') as f:
+            gradebook = json.load(f)
+        self.conn.executemany("INSERT OR IGNORE INTO students (name) VALUES (?)", ((name,) for name in gradebook))
+        self._upsert_grades((name, subject, grade)
+                            for name, subjects_grades in gradebook.items()
+                            for subject, grade in subjects_grades.items())
+        self.conn.commit()
+        self.subject_stats = None
+        self.student_stats = None
+        print(f"Imported {len(gradebook)} students from {filename}.")
+
+    def import_csv(self, path, chunk_size=100_000):
+        #merges (student, subject, grade) rows from an exam-board export, adding any new students
+        #each chunk is written with one statement per table and committed on its own
+        #returns (imported, rejected)
+        imported = rejected = 0
+        for rows in read_grade_chunks(path, chunk_size):
+            #later rows for the same student and subject win, as if they were entered one after another
+            grades = {}
+            for student, subject, grade in rows:
+                try:
+                    grade = int(grade)
+                except ValueError:
+                    grade = -1
+                if not student or not subject or not 0 <= grade <= 100:
+                    rejected += 1
+                    continue
+                grades[student, subject] = grade
+                imported += 1
+            #every student of the chunk is looked up once, however many rows they have
+            #both go in key order, so consecutive writes land on the same index pages
+            students = sorted({student for student, _ in grades})
+            self.conn.executemany("INSERT OR IGNORE INTO students (name) VALUES (?)", ((name,) for name in students))
+            self._upsert_grades((student, subject, grade) for (student, subject), grade in sorted(grades.items()))
+            self.conn.commit()
+            self._touch_many(students, {subject for _, subject in grades})
+        print(f"Imported {imported} grades, rejected {rejected} invalid rows.")
+        return imported, rejected
+
     def save_gradebook(self):
-        with open(self.filename, 'w') as f:
-            json.dump(self.gradebook, f, indent=1)
-    
+        #changes are already written row by row, saving only makes them durable
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
     def add_student(self, name, subjects_grades):
-        if name in self.gradebook:
+        if self._exists(name):
             print("Student already exists!")
         else:
-            self.gradebook[name] = subjects_grades
+            self.conn.execute("INSERT INTO students (name) VALUES (?)", (name,))
+            self._upsert_grades((name, subject, grade) for subject, grade in subjects_grades.items())
+            self._touch(name, subjects_grades)
             print(f"Student {name} added succesfully.")
-            
+
     def update_student(self, name, subjects_grades):
-        if name in self.gradebook:
-            self.gradebook[name].update(subjects_grades)
+        if self._exists(name):
+            self._upsert_grades((name, subject, grade) for subject, grade in subjects_grades.items())
+            self._touch(name, subjects_grades)
             print(f"Grades updated for {name}!")
-        else:  
+        else:
             print("Student not found.")
-        
+
     def delete_student(self, name):
-        if name in self.gradebook:
-            del self.gradebook[name]
+        if self._exists(name):
+            self._touch(name, self.get_grades(name))
+            self.conn.execute("DELETE FROM grades WHERE student = ?", (name,))
+            self.conn.execute("DELETE FROM students WHERE name = ?", (name,))
             print(f"Student {name} deleted!")
-        else:  
+        else:
             print("Student not found.")
-    
+
     def view_grades(self, name):
-        if name in self.gradebook:
+        grades = self.get_grades(name)
+        if grades is not None:
             print(f"{name}'s Grades:")
-            for subject, grade in self.gradebook[name].items():
+            for subject, grade in grades.items():
                 print(f" - {subject}: {grade}")
         else:
             print("Student not found.")
-    
+
     def calculate_average(self, name):
-        if name in self.gradebook:
-            grades = list(self.gradebook[name].values())
+        grades = self.get_grades(name)
+        if grades is None:
+            print("Student not found.")
+        elif not grades:
+            print(f"No grades recorded for {name}.")
+        else:
+            grades = list(grades.values())
             avg = sum(grades)/len(grades)
             cgpa = (avg/100)*10
             print(f"Average grade for {name}: {avg:.2f}")
             print(f"CGPA for {name}: {cgpa:.2f}")
-        else:
+
+    def class_analytics(self, top_n=10):
+        #mean, median and percentiles per subject, the CGPA distribution and the top_n students
+        from gradebook_analytics import PERCENTILES, cgpa_distribution, top_students
+
+        subject_stats = self._subject_stats()
+        student_stats = self._student_stats()
+        analytics = {
+            'subjects': subject_stats,
+            'cgpa_distribution': cgpa_distribution(student_stats),
+            'top_students': top_students(student_stats, top_n),
+        }
+        if not subject_stats:
+            print("No grades recorded.")
+            return analytics
+        print(f"{'Subject':<15}{'Students':>10}{'Mean':>8}{'Median':>8}" + ''.join(f"{'P' + str(p):>8}" for p in PERCENTILES))
+        for subject, stats in sorted(subject_stats.items()):
+            print(f"{subject:<15}{stats['count']:>10}{stats['mean']:>8.2f}{stats['median']:>8.2f}"
+                  + ''.join(f"{stats['percentiles'][p]:>8.2f}" for p in PERCENTILES))
+        print("CGPA distribution:")
+        for low, high, count in analytics['cgpa_distribution']:
+            print(f" - {low}-{high}: {count}")
+        print(f"Top {len(analytics['top_students'])} students:")
+        for name, avg in analytics['top_students']:
+            print(f" - {name}: {avg:.2f} (CGPA {avg / 10:.2f})")
+        return analytics
+
+    def percentile_rank(self, name, subject=None):
+        #share of the class below the student's average, or below their grade in subject
+        grades = self.get_grades(name)
+        if grades is None:
             print("Student not found.")
-    
+            return None
+        from gradebook_analytics import percentile_rank
+
+        if subject is None:
+            if not grades:
+                print(f"No grades recorded for {name}.")
+                return None
+            value = sum(grades.values())/len(grades)
+            rank = percentile_rank(self._student_stats()['sorted_averages'], value)
+        elif subject in grades:
+            value = grades[subject]
+            rank = percentile_rank(self._subject_stats()[subject]['grades'], value)
+        else:
+            print(f"{name} has no grade in {subject}.")
+            return None
+        print(f"{name} is ahead of {rank:.2f}% of the class" + (f" in {subject}." if subject else "."))
+        return rank
+
+    def get_grades(self, name):
+        #subject -> grade in the order they were entered, or None if there is no such student
+        if not self._exists(name):
+            return None
+        rows = self.conn.execute("SELECT subject, grade FROM grades WHERE student = ? ORDER BY rowid", (name,))
+        return dict(rows)
+
+    def _exists(self, name):
+        return self.conn.execute("SELECT 1 FROM students WHERE name = ?", (name,)).fetchone() is not None
+
+    def _touch(self, name, subjects):
+        #marks the cached analytics that depend on this student and these subjects
+        self._touch_many((name,), subjects)
+
+    def _touch_many(self, names, subjects):
+        self.stale_subjects.update(subjects)
+        if self.student_stats is not None:
+            self.stale_students.update(names)
+            #patching students one by one only pays off while few of them changed
+            if len(self.stale_students) > len(self.student_stats['names']) // 10:
+                self.student_stats = None
+                self.stale_students = set()
+
+    def _subject_stats(self):
+        from gradebook_analytics import subject_stats
+
+        if self.subject_stats is None:
+            subjects = [subject for (subject,) in self.conn.execute("SELECT DISTINCT subject FROM grades")]
+            self.subject_stats = subject_stats(self.conn, subjects)
+        elif self.stale_subjects:
+            for subject in self.stale_subjects:
+                self.subject_stats.pop(subject, None)
+            self.subject_stats.update(subject_stats(self.conn, sorted(self.stale_subjects)))
+        self.stale_subjects = set()
+        return self.subject_stats
+
+    def _student_stats(self):
+        from gradebook_analytics import refresh_student_stats, student_stats
+
+        if self.student_stats is None:
+            self.student_stats = student_stats(self.conn)
+        elif self.stale_students:
+            self.student_stats = refresh_student_stats(self.conn, self.student_stats, self.stale_students)
+        self.stale_students = set()
+        return self.student_stats
+
+    def _upsert_grades(self, rows):
+        #(student, subject, grade) rows; a subject the student already has keeps its place and gets the new grade
+        self.conn.executemany("""
+            INSERT INTO grades (student, subject, grade) VALUES (?, ?, ?)
+            ON CONFLICT (student, subject) DO UPDATE SET grade = excluded.grade
+        """, rows)
+
+def read_grade_chunks(path, chunk_size=100_000):
+    #lists of (student, subject, grade) string rows from a csv with those columns in its header
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = {field.strip().lower(): i for i, field in enumerate(header)}
+        missing = {'student', 'subject', 'grade'} - set(columns)
+        if missing:
+            raise ValueError(f"{path} is missing the column(s): {', '.join(sorted(missing))}")
+        student, subject, grade = columns['student'], columns['subject'], columns['grade']
+        width = max(student, subject, grade) + 1
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+            #short rows come out empty and are rejected like any other invalid row
+            yield [(row[student].strip(), row[subject].strip(), row[grade]) if len(row) >= width else ('', '', '')
+                   for row in rows]
+
 def main():
-    gradebook = Gradebook("gradebook.json")
+    #the first run on a new database brings over the old json gradebook
+    new_database = not os.path.exists("gradebook.db")
+    gradebook = Gradebook("gradebook.db")
+    if new_database and os.path.exists("gradebook.json"):
+        gradebook.import_json("gradebook.json")
 
     while True:
         print("\n1. Add Student\n2. Update Grades\n3. Delete Student\n4. View Student Grades")
-        print("5. Calculate Average Grade\n6. Save & Exit")
+        print("5. Calculate Average Grade\n6. Save & Exit\n7. Class Analytics\n8. Import Grades from CSV")
 
         choice = input("Choose an option: ").strip()
 
@@ -79,7 +284,7 @@ def main():
             subjects = input("Enter subjects and grades to update (e.g., Math:95): ")
             subjects_grades = dict(item.split(":") for item in subjects.split(", "))
             subjects_grades = {k: int(v) for k, v in subjects_grades.items()}
-            gradebook.update_grades(name, subjects_grades)
+            gradebook.update_student(name, subjects_grades)
 
         elif choice == '3':
             name = input("Enter student name: ")
@@ -95,13 +300,22 @@ def main():
 
         elif choice == '6':
             gradebook.save_gradebook()
+            gradebook.close()
             print("Saving gradebook and exiting...")
             break
 
+        elif choice == '7':
+            gradebook.class_analytics()
+
+        elif choice == '8':
+            path = input("Enter CSV file path (columns student, subject, grade): ").strip()
+            try:
+                gradebook.import_csv(path)
+            except (OSError, ValueError) as e:
+                print(f"Could not import {path}: {e}")
+
         else:
             print("Invalid option. Please try again.")
 
 if __name__ == "__main__":
     main()
-        
-                
\ No newline at end of file
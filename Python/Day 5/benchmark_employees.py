@@ -0,0 +1,75 @@
+#EmployeeManager.query against the list comprehensions it replaces
+
+import contextlib
+import heapq
+import io
+import random
+import sys
+import time
+
+from employee_management import EmployeeManager
+
+DEPARTMENTS = ['Engineering', 'Sales', 'Support', 'Finance', 'HR', 'Legal', 'Marketing', 'Operations']
+
+
+def make_manager(count):
+    rng = random.Random(0)
+    manager = EmployeeManager('benchmark_employees_none.csv')
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(count):
+            manager.add_employee(f"Employee {i}", rng.randint(20, 65), rng.choice(DEPARTMENTS),
+                                 float(rng.randrange(20_000, 200_000)))
+    return manager
+
+
+def timed(action, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = action()
+    return (time.perf_counter() - start) / repeat, result
+
+
+if __name__ == "__main__":
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Building {COUNT:,} employees...")
+    manager = make_manager(COUNT)
+    employees = manager.employees
+
+    def hand_grouped():
+        groups = {}
+        for e in employees.values():
+            if e.age >= 40:
+                groups.setdefault(e.department, []).append(e.salary)
+        return {d: sum(s) / len(s) for d, s in groups.items()}
+
+    cases = [
+        ("filter, 2 conditions",
+         lambda: len(list(manager.query([('age', '>=', 40), ('salary', '<', 50_000)]))),
+         lambda: len([e for e in employees.values() if e.age >= 40 and e.salary < 50_000])),
+        ("department index",
+         lambda: len(list(manager.query({'department': 'Legal'}))),
+         lambda: len([e for e in employees.values() if e.department == 'Legal'])),
+        ("top 10, sorted by hand",
+         lambda: list(manager.query([('age', '<', 30)], order_by='salary', descending=True, limit=10)),
+         lambda: sorted([e for e in employees.values() if e.age < 30], key=lambda e: e.salary, reverse=True)[:10]),
+        ("top 10, heapq by hand",
+         lambda: list(manager.query([('age', '<', 30)], order_by='salary', descending=True, limit=10)),
+         lambda: heapq.nlargest(10, (e for e in employees.values() if e.age < 30), key=lambda e: e.salary)),
+        ("first match",
+         lambda: next(manager.query([('salary', '>', 199_990)])),
+         lambda: [e for e in employees.values() if e.salary > 199_990][0]),
+        ("avg salary by dept",
+         lambda: dict(manager.query(group_by='department', agg={'avg': ('avg', 'salary')})),
+         lambda: {d: sum(e.salary for e in employees.values() if e.department == d) /
+                     sum(1 for e in employees.values() if e.department == d) for d in DEPARTMENTS}),
+        ("avg by dept, age >= 40",
+         lambda: dict(manager.query([('age', '>=', 40)], group_by='department', agg={'avg': ('avg', 'salary')})),
+         hand_grouped),
+    ]
+
+    print(f"{'query':<24}{'query()':>12}{'by hand':>12}{'speed-up':>10}")
+    for label, engine, by_hand in cases:
+        repeat = 3
+        engine_time, _ = timed(engine, repeat)
+        hand_time, _ = timed(by_hand, repeat)
+        print(f"{label:<24}{engine_time * 1000:>9.1f} ms{hand_time * 1000:>9.1f} ms{hand_time / engine_time:>9.1f}x")
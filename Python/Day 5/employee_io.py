@@ -0,0 +1,150 @@
+#Parallel loading of large employee CSV files.
+#The file is cut into byte ranges on line boundaries and every range is parsed in its own process;
+#rows that contain a quoted line break are not supported, save_employees never writes one
+
+import csv
+import gc
+import io
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+#files smaller than this are parsed in-process, starting the pool would cost more than it saves
+PARALLEL_THRESHOLD = 8 * 1024 * 1024
+#ranges per worker, so one slow range does not leave the other workers idle at the end
+RANGES_PER_WORKER = 4
+
+
+@contextmanager
+def gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def read_employee_chunks(filename, workers=None):
+    #(employee_ids, names, ages, departments, salaries) column lists per range, in file order
+    #employee_ids holds None for rows without an id
+    columns, ranges = _split(filename, workers)
+    yield from _map(_parse_range, [(filename, start, end, columns) for start, end in ranges], workers)
+
+
+def summarize_salaries(filename, band_width, workers=None):
+    #department -> salary summary straight from the file, without building any Employee;
+    #the None key holds the summary over everyone
+    #each summary is a dict with count, average, min, max and histogram as in EmployeeManager
+    columns, ranges = _split(filename, workers)
+    totals = {}
+    for partial in _map(_summarize_range, [(filename, start, end, columns, band_width) for start, end in ranges], workers):
+        for department, (count, total, low, high, bands) in partial.items():
+            merged = totals.get(department)
+            if merged is None:
+                totals[department] = [count, total, low, high, bands]
+            else:
+                merged[0] += count
+                merged[1] += total
+                merged[2] = min(merged[2], low)
+                merged[3] = max(merged[3], high)
+                merged[4].update(bands)
+    if totals:
+        overall = [0, 0, float('inf'), float('-inf'), Counter()]
+        for count, total, low, high, bands in totals.values():
+            overall[0] += count
+            overall[1] += total
+            overall[2] = min(overall[2], low)
+            overall[3] = max(overall[3], high)
+            overall[4].update(bands)
+        totals[None] = overall
+    return {
+        department: {
+            'count': count,
+            'average': total / count,
+            'min': low,
+            'max': high,
+            'histogram': [(band * band_width, (band + 1) * band_width, n) for band, n in sorted(bands.items())],
+        }
+        for department, (count, total, low, high, bands) in totals.items()
+    }
+
+
+def _split(filename, workers):
+    #column positions from the header, and (start, end) byte ranges that each begin on a new line
+    if not os.path.exists(filename):
+        return None, []
+    with open(filename, 'rb') as f:
+        header_line = f.readline()
+        #an empty file has no columns and no employees
+        if not header_line.strip():
+            return None, []
+        header = next(csv.reader([header_line.decode('utf-8')]), [])
+        columns = {field: i for i, field in enumerate(header)}
+        missing = {'name', 'age', 'department', 'salary'} - set(columns)
+        if missing:
+            raise ValueError(f"{filename} is missing the column(s): {', '.join(sorted(missing))}")
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        pieces = 1 if size < PARALLEL_THRESHOLD else (workers or os.cpu_count() or 1) * RANGES_PER_WORKER
+        ranges = []
+        for i in range(1, pieces + 1):
+            end = size if i == pieces else max(start, size * i // pieces)
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            if end > start:
+                ranges.append((start, end))
+                start = end
+    return columns, ranges
+
+
+def _map(function, tasks, workers):
+    if len(tasks) <= 1 or workers == 1:
+        yield from map(function, tasks)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        yield from pool.map(function, tasks)
+
+
+def _rows(filename, start, end):
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    #splitlines would also break on characters like U+2028 that may appear inside a name
+    return csv.reader(io.StringIO(data.decode('utf-8'), newline=''))
+
+
+def _parse_range(task):
+    filename, start, end, columns = task
+    has_ids = 'employee_id' in columns
+    id_column = columns.get('employee_id')
+    name, age, department, salary = columns['name'], columns['age'], columns['department'], columns['salary']
+    employee_ids, names, ages, departments, salaries = [], [], [], [], []
+    for row in _rows(filename, start, end):
+        if not row:
+            continue
+        employee_ids.append(int(row[id_column]) if has_ids and row[id_column] else None)
+        names.append(row[name])
+        ages.append(int(row[age]))
+        departments.append(row[department])
+        salaries.append(float(row[salary]))
+    return employee_ids, names, ages, departments, salaries
+
+
+def _summarize_range(task):
+    #department -> [count, total, min, max, band counts] for one range
+    filename, start, end, columns, band_width = task
+    department, salary = columns['department'], columns['salary']
+    salaries_of = {}
+    for row in _rows(filename, start, end):
+        if row:
+            salaries_of.setdefault(row[department], []).append(float(row[salary]))
+    return {
+        name: [len(salaries), sum(salaries), min(salaries), max(salaries),
+               Counter(int(value // band_width) for value in salaries)]
+        for name, salaries in salaries_of.items()
+    }
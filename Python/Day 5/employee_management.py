@@ -1,10 +1,15 @@
 #An Employee Management System
 
+import argparse
 import csv
-import os
+import heapq
+from collections import Counter
 
 class Employee:
-    def __init__(self, name, age, department, salary):
+    __slots__ = ('employee_id', 'name', 'age', 'department', 'salary')
+
+    def __init__(self, name, age, department, salary, employee_id=None):
+        self.employee_id = employee_id
         self.name = name
         self.age = age
         self.department = department
@@ -12,46 +17,164 @@ class Employee:
         
     def to_dict(self):
         return{
+            "employee_id": self.employee_id,
             "name": self.name,
             "age": self.age,
             "department": self.department,
             "salary": self.salary
         }
         
+class SalaryStats:
+    #running salary aggregates for one group of employees, updated in O(1) or O(log n) per change
+    #min and max come from heaps with lazy deletion: a removed salary is only popped once it reaches the top
+    band_width = 10000
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min_heap = []
+        self.max_heap = []
+        #salary -> removals not yet popped from each heap
+        self.min_removed = Counter()
+        self.max_removed = Counter()
+        #band number -> employees with a salary in [band * band_width, (band + 1) * band_width)
+        self.bands = Counter()
+
+    def add(self, salary):
+        self.add_many((salary,))
+
+    def add_many(self, salaries):
+        self.count += len(salaries)
+        self.total += sum(salaries)
+        #a big batch is cheaper to heapify in one go than to push one by one
+        if len(salaries) * 8 > len(self.min_heap):
+            self.min_heap.extend(salaries)
+            self.max_heap.extend(-salary for salary in salaries)
+            heapq.heapify(self.min_heap)
+            heapq.heapify(self.max_heap)
+        else:
+            for salary in salaries:
+                heapq.heappush(self.min_heap, salary)
+                heapq.heappush(self.max_heap, -salary)
+        self.bands.update(int(salary // self.band_width) for salary in salaries)
+
+    def remove(self, salary):
+        self.count -= 1
+        #the last one out takes the rounding leftover of the running total with it
+        self.total = self.total - salary if self.count else 0
+        self.min_removed[salary] += 1
+        self.max_removed[salary] += 1
+        band = int(salary // self.band_width)
+        self.bands[band] -= 1
+        if not self.bands[band]:
+            del self.bands[band]
+        #drop the dead entries once they make up most of the heaps
+        if len(self.min_heap) > 2 * self.count + 64:
+            self.min_heap = self._live(self.min_heap, self.min_removed, 1)
+            self.max_heap = self._live(self.max_heap, self.max_removed, -1)
+
+    def average(self):
+        return self.total / self.count if self.count else None
+
+    def minimum(self):
+        return self._top(self.min_heap, self.min_removed, 1)
+
+    def maximum(self):
+        return self._top(self.max_heap, self.max_removed, -1)
+
+    def histogram(self):
+        #[(low, high, count)] for every salary band that has employees, lowest first
+        return [(band * self.band_width, (band + 1) * self.band_width, count) for band, count in sorted(self.bands.items())]
+
+    @staticmethod
+    def _top(heap, removed, sign):
+        while heap and removed[sign * heap[0]]:
+            removed[sign * heapq.heappop(heap)] -= 1
+        return sign * heap[0] if heap else None
+
+    @staticmethod
+    def _live(heap, removed, sign):
+        live = []
+        for entry in heap:
+            if removed[sign * entry]:
+                removed[sign * entry] -= 1
+            else:
+                live.append(entry)
+        removed.clear()
+        heapq.heapify(live)
+        return live
+
+
 class EmployeeManager:
-    def __init__(self, filename):
+    fieldnames = ['employee_id', 'name', 'age', 'department', 'salary']
+
+    def __init__(self, filename, workers=None):
         self.filename = filename
-        self.employees = self.load_employees()
+        #employee id -> Employee, in the order they were added
+        self.employees = {}
+        #name -> ids and department -> ids; dicts with None values serve as ordered sets,
+        #so the first employee with a name stays the one that is found, and removal is O(1)
+        self.by_name = {}
+        self.by_department = {}
+        #running salary aggregates for everyone and per department
+        self.salary_stats = SalaryStats()
+        self.department_stats = {}
+        self.next_id = 1
+        self.load_employees(workers)
     
-    def load_employees(self):
-        employees = []
-        if os.path.exists(self.filename):
-            with open(self.filename, newline='') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    employees.append(Employee(row['name'], int(row['age']), row['department'], float(row['salary'])))
-        return employees
+    def load_employees(self, workers=None):
+        #big files are parsed in chunks by a pool of worker processes, the employees are added here in file order
+        #returns how many were loaded; a row whose id is already taken is skipped
+        from employee_io import gc_paused, read_employee_chunks
+
+        loaded = skipped = 0
+        #rows without an id (files saved before employees had ids) are numbered in file order, but only
+        #after every explicit id in the file is known, so a number handed out early never collides with one
+        unnumbered = []
+        #none of the objects built here form cycles, yet each new batch of them triggers a collection that
+        #rescans everything loaded so far; with it paused a million employees load about a fifth faster
+        with gc_paused():
+            for employee_ids, names, ages, departments, salaries in read_employee_chunks(self.filename, workers):
+                employees = [Employee(name, age, department, salary, employee_id) for employee_id, name, age, department, salary
+                             in zip(employee_ids, names, ages, departments, salaries)]
+                if None in employee_ids:
+                    unnumbered.extend(employee for employee in employees if employee.employee_id is None)
+                    employees = [employee for employee in employees if employee.employee_id is not None]
+                inserted = self._insert_many(employees)
+                loaded += inserted
+                skipped += len(employees) - inserted
+            loaded += self._insert_many(unnumbered)
+        if skipped:
+            print(f"Skipped {skipped} employees whose employee_id was already taken.")
+        return loaded
     
     def save_employees(self):
-        with open(self.filename, mode='r', newline='') as f:
-            writer = csv.DictReader(f, fieldnames=['name', 'age', 'department', 'salary'])
+        with open(self.filename, mode='w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
             writer.writeheader()
-            for employee in self.employees:
-                writer.writrow(employee.to_dict())
+            for employee in self.employees.values():
+                writer.writerow(employee.to_dict())
                 
     def add_employee(self, name, age, department, salary):
-        self.employees.append(Employee(name, age, department, salary))
+        employee = self._insert(Employee(name, age, department, salary))
         print(f"Employee {name} added successfully")
+        return employee.employee_id
         
     def update_employee(self, name, age=None, department=None, salary=None):
         employee = self.find_employee(name)
         if employee:
-            if age:
+            if age is not None:
                 employee.age = age
-            if department:
+            if department is not None or salary is not None:
+                self._remove_salary(employee)
+            if department is not None and department != employee.department:
+                self._unindex(self.by_department, employee.department, employee.employee_id)
                 employee.department = department
-            if salary:
+                self.by_department.setdefault(department, {})[employee.employee_id] = None
+            if salary is not None:
                 employee.salary = salary
+            if department is not None or salary is not None:
+                self._add_salary(employee)
             print(f"Employee {name}'s details updated.")
         else:
             print(f"Employee {name} not found")
@@ -59,16 +182,103 @@ class EmployeeManager:
     def remove_employee(self, name):
         employee = self.find_employee(name)
         if employee:
-            self.employees.remove(employee)
+            del self.employees[employee.employee_id]
+            self._unindex(self.by_name, employee.name, employee.employee_id)
+            self._unindex(self.by_department, employee.department, employee.employee_id)
+            self._remove_salary(employee)
             print(f"Employee {name} removed.")
         else:
             print(f"Employee {name} not found")
             
     def find_employee(self, name):
-        for emp in self.employees:
-            if emp.name == name:
-                return emp
-        return None
+        ids = self.by_name.get(name)
+        return self.employees[next(iter(ids))] if ids else None
+
+    def get_employee(self, employee_id):
+        return self.employees.get(employee_id)
+
+    def employees_in_department(self, department):
+        return [self.employees[employee_id] for employee_id in self.by_department.get(department, ())]
+
+    def average_salary(self, department=None):
+        #O(1) from the running totals; None if there is nobody to average
+        stats = self._stats(department)
+        return stats.average() if stats else None
+
+    def salary_range(self, department=None):
+        #(lowest, highest) salary, or None if there is nobody in the department
+        stats = self._stats(department)
+        if not stats or not stats.count:
+            return None
+        return stats.minimum(), stats.maximum()
+
+    def salary_histogram(self, department=None):
+        #[(low, high, count)] per salary band of SalaryStats.band_width
+        stats = self._stats(department)
+        return stats.histogram() if stats else []
+
+    def query(self, where=None, order_by=None, descending=False, limit=None, group_by=None, agg=None):
+        #where: {field: value} for equalities, or [(field, operator, value), ...]
+        #  with operators ==, !=, <, <=, >, >=, in, not in and startswith
+        #order_by / group_by: a field name or a list of them
+        #agg: {output name: (count|sum|avg|min|max, field)}
+        #without agg or group_by this yields matching employees, lazily unless they have to be sorted;
+        #with them it yields (group key, {output name: value}) pairs, the key is None when group_by is not given
+        from employee_query import run_query
+
+        return run_query(self, where, order_by, descending, limit, group_by, agg)
+
+    def _stats(self, department):
+        return self.salary_stats if department is None else self.department_stats.get(department)
+
+    def _add_salary(self, employee):
+        self._add_salaries(employee.department, (employee.salary,))
+
+    def _add_salaries(self, department, salaries):
+        self.salary_stats.add_many(salaries)
+        stats = self.department_stats.get(department)
+        if stats is None:
+            stats = self.department_stats[department] = SalaryStats()
+        stats.add_many(salaries)
+
+    def _remove_salary(self, employee):
+        self.salary_stats.remove(employee.salary)
+        stats = self.department_stats[employee.department]
+        stats.remove(employee.salary)
+        if not stats.count:
+            del self.department_stats[employee.department]
+
+    def _insert(self, employee):
+        self._insert_many((employee,))
+        return employee
+
+    def _insert_many(self, employees):
+        #the salary aggregates are fed once per department rather than once per employee
+        #employees without an id get the next free one; one whose id is taken is left out
+        #returns how many were inserted
+        salaries_of = {}
+        inserted = 0
+        for employee in employees:
+            if employee.employee_id is None:
+                employee.employee_id = self.next_id
+            elif employee.employee_id in self.employees:
+                continue
+            inserted += 1
+            self.next_id = max(self.next_id, employee.employee_id + 1)
+            self.employees[employee.employee_id] = employee
+            self.by_name.setdefault(employee.name, {})[employee.employee_id] = None
+            self.by_department.setdefault(employee.department, {})[employee.employee_id] = None
+            salaries_of.setdefault(employee.department, []).append(employee.salary)
+        for department, salaries in salaries_of.items():
+            self._add_salaries(department, salaries)
+        return inserted
+
+    @staticmethod
+    def _unindex(index, key, employee_id):
+        ids = index[key]
+        del ids[employee_id]
+        if not ids:
+            del index[key]
     
     def view_all_employees(self):
         if not self.employees:
@@ -77,7 +287,7 @@ class EmployeeManager:
         print("------------------------------------------------")
         print("| Name          | Age  | Dept       | Salary   |")
         print("------------------------------------------------")
-        for emp in self.employees:
+        for emp in self.employees.values():
             print(f"| {emp.name:<13} | {emp.age:<4} | {emp.department:<10} | {emp.salary:<8} |")
         print("------------------------------------------------")
     
@@ -86,20 +296,40 @@ class EmployeeManager:
             print(f"No employees to calculate average salary")
             return
         
-        # filtering by departments
-        filtered_employees = [emp for emp in self.employees if department is None or emp.department == department]
+        avg_salary = self.average_salary(department)
         
-        if not filtered_employees:
+        if avg_salary is None:
             print(f"No employees found in department: {department}" if department else "No employees found.")
             return
-        total_salary = sum(emp.salary for emp in filtered_employees)
-        avg_salary = total_salary / len(filtered_employees)
         
         if department:
             print(f"Average Salary in {department} Department: {avg_salary:.2f}")
         else:
             print(f"Average Salary for all employees: {avg_salary:.2f}")
 
+    def view_salary_report(self, department=None):
+        salary_range = self.salary_range(department)
+        if salary_range is None:
+            print(f"No employees found in department: {department}" if department else "No employees found.")
+            return
+        print(f"Salary range: {salary_range[0]:.2f} - {salary_range[1]:.2f}")
+        for low, high, count in self.salary_histogram(department):
+            print(f" {low:>10} - {high:<10} {count}")
+
+def print_salary_summary(filename, department=None, workers=None):
+    #salary statistics read straight from the file, without loading the roster
+    from employee_io import summarize_salaries
+
+    summary = summarize_salaries(filename, SalaryStats.band_width, workers).get(department)
+    if summary is None:
+        print(f"No employees found in department: {department}" if department else "No employees found.")
+        return
+    print(f"Employees: {summary['count']}")
+    print(f"Average Salary: {summary['average']:.2f}")
+    print(f"Salary range: {summary['min']:.2f} - {summary['max']:.2f}")
+    for low, high, count in summary['histogram']:
+        print(f" {low:>10} - {high:<10} {count}")
+
 def get_input(prompt, cast_type=str, optional=False):
     value = input(prompt)
     if optional and value == "":
@@ -111,7 +341,16 @@ def get_input(prompt, cast_type=str, optional=False):
         return get_input(prompt, cast_type, optional)
     
 def main():
-    manager = EmployeeManager('employees.csv')
+    parser = argparse.ArgumentParser(description="Employee Management System")
+    parser.add_argument('--summary', action='store_true', help="Print salary statistics from the file and exit")
+    parser.add_argument('--department', help="Department for --summary, all employees if left out")
+    parser.add_argument('--workers', type=int, help="Processes used to parse the file")
+    args = parser.parse_args()
+    if args.summary:
+        print_salary_summary('employees.csv', args.department, args.workers)
+        return
+
+    manager = EmployeeManager('employees.csv', args.workers)
 
     actions = {
         '1': lambda: manager.add_employee(
@@ -130,11 +369,12 @@ def main():
         '4': manager.view_all_employees,
         '5': lambda: manager.calculate_average_salary(get_input("Enter department (or press Enter for all): ", optional=True)),
         '6': lambda: manager.save_employees() or print("Saving employee records and exiting..."),
+        '7': lambda: manager.view_salary_report(get_input("Enter department (or press Enter for all): ", optional=True)),
     }
 
     while True:
         print("\n1. Add Employee\n2. Update Employee\n3. Remove Employee\n4. View All Employees")
-        print("5. Calculate Average Salary\n6. Save & Exit")
+        print("5. Calculate Average Salary\n6. Save & Exit\n7. Salary Report")
         
         choice = input("Choose an option: ").strip()
 
@@ -0,0 +1,224 @@
+#A small query engine over EmployeeManager: filter, sort, group and aggregate.
+#Conditions and aggregations are compiled into a generated loop with the tests written inline,
+#so an employee that does not match costs no function call at all, and results are produced lazily.
+#The generated code depends only on the shape of a query (fields, operators, grouping and aggregates)
+#and is cached by it; the values being compared against are passed in on every call
+
+import heapq
+from functools import lru_cache
+from itertools import chain, islice
+from operator import attrgetter
+
+FIELDS = ('employee_id', 'name', 'age', 'department', 'salary')
+#how each operator reads in generated code, given the field and the bound value
+OPERATORS = {
+    '==': '{} == {}',
+    '!=': '{} != {}',
+    '<': '{} < {}',
+    '<=': '{} <= {}',
+    '>': '{} > {}',
+    '>=': '{} >= {}',
+    'in': '{} in {}',
+    'not in': '{} not in {}',
+    'startswith': '{}.startswith({})',
+}
+AGGREGATES = ('count', 'sum', 'avg', 'min', 'max')
+#distinct query shapes whose generated code is kept
+COMPILED_CACHE_SIZE = 256
+
+
+def normalize_where(where):
+    #where is a {field: value} dict of equalities or a list of (field, operator, value) conditions
+    if where is None:
+        return []
+    if isinstance(where, dict):
+        where = [(field, '==', value) for field, value in where.items()]
+    conditions = []
+    for field, op, value in where:
+        _check_field(field)
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator: {op}")
+        if op in ('in', 'not in'):
+            #kept in the caller's order without repeats, an index lookup goes through them in that order
+            value = tuple(dict.fromkeys(value))
+        conditions.append((field, op, value))
+    return conditions
+
+
+def shape_of(conditions):
+    return tuple((field, op) for field, op, _ in conditions)
+
+
+def values_of(conditions):
+    #what the generated code compares against, in the order of its v0, v1, ... parameters
+    return [frozenset(value) if op in ('in', 'not in') else value for _, op, value in conditions]
+
+
+def compile_where(shape):
+    #(expression testing every (field, operator) of shape on e, its parameters), or (None, '') when there is
+    #nothing to test; the values are parameters of the generated code, never pasted into it
+    if not shape:
+        return None, ''
+    terms = [OPERATORS[op].format(f'e.{field}', f'v{i}') for i, (field, op) in enumerate(shape)]
+    return ' and '.join(terms), ''.join(f', v{i}' for i in range(len(shape)))
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_scan(shape):
+    #generator function scan(rows, *values) yielding the rows that pass every condition
+    test, params = compile_where(shape)
+    lines = [
+        f"def scan(rows{params}):",
+        "    for e in rows:",
+        f"        if {test}:",
+        "            yield e",
+    ]
+    env = {}
+    exec('\n'.join(lines), env)
+    return env['scan']
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_aggregate(shape, group_by, agg):
+    #agg is a tuple of (output name, (function, field)) pairs
+    #function aggregate(rows, *values) turning employees into {group key: [count, accumulators...]} in one pass
+    #over the ones that pass every condition, and a function that turns one group's accumulators into
+    #{output name: value}
+    test, params = compile_where(shape)
+    slots = {}
+    updates = []
+    for name, (function, field) in agg:
+        if function == 'count':
+            continue
+        _check_field(field)
+        kind = 'sum' if function in ('sum', 'avg') else function
+        if (kind, field) in slots:
+            continue
+        slot = slots[(kind, field)] = len(slots) + 1
+        if kind == 'sum':
+            updates.append(f"s[{slot}] += e.{field}")
+        elif kind == 'min':
+            updates.append(f"if s[{slot}] is None or e.{field} < s[{slot}]: s[{slot}] = e.{field}")
+        else:
+            updates.append(f"if s[{slot}] is None or e.{field} > s[{slot}]: s[{slot}] = e.{field}")
+    initial = ', '.join(['0'] + ['0' if kind == 'sum' else 'None' for kind, _ in slots])
+    for field in group_by:
+        _check_field(field)
+    key = '(' + ''.join(f'e.{field}, ' for field in group_by) + ')' if len(group_by) != 1 else f'e.{group_by[0]}'
+    lines = [
+        f"def aggregate(rows{params}):",
+        "    groups = {}",
+        "    for e in rows:",
+    ] + ([f"        if not ({test}):", "            continue"] if test else []) + [
+        f"        k = {key}",
+        "        s = groups.get(k)",
+        "        if s is None:",
+        f"            s = groups[k] = [{initial}]",
+        "        s[0] += 1",
+    ] + [f"        {update}" for update in updates] + [
+        "    return groups",
+    ]
+    env = {}
+    exec('\n'.join(lines), env)
+
+    def finish(s):
+        results = {}
+        for name, (function, field) in agg:
+            if function == 'count':
+                results[name] = s[0]
+            elif function == 'avg':
+                results[name] = s[slots[('sum', field)]] / s[0]
+            else:
+                results[name] = s[slots[(function, field)]]
+        return results
+
+    return env['aggregate'], finish
+
+
+def run_query(manager, where=None, order_by=None, descending=False, limit=None, group_by=None, agg=None):
+    conditions = normalize_where(where)
+    if agg is not None or group_by is not None:
+        return _grouped(manager, conditions, order_by, descending, limit, _as_tuple(group_by), agg or {'count': ('count', None)})
+    rows = _candidates(manager, conditions)
+    if conditions:
+        rows = compile_scan(shape_of(conditions))(rows, *values_of(conditions))
+    if order_by is not None:
+        fields = _as_tuple(order_by)
+        for field in fields:
+            _check_field(field)
+        key = attrgetter(*fields)
+        if limit is not None:
+            #only the first limit rows are ever kept, the rest is never sorted
+            select = heapq.nlargest if descending else heapq.nsmallest
+            return iter(select(limit, rows, key=key))
+        return iter(sorted(rows, key=key, reverse=descending))
+    return islice(rows, limit) if limit is not None else iter(rows)
+
+
+def _candidates(manager, conditions):
+    #employees that can possibly match, read from an index when a condition allows it;
+    #the condition used is taken out of the list, what is left still has to be tested
+    for field in ('employee_id', 'name', 'department'):
+        for i, (condition_field, op, value) in enumerate(conditions):
+            if condition_field != field or op not in ('==', 'in'):
+                continue
+            del conditions[i]
+            #an in list is looked up value by value, in the order it was given
+            values = [value] if op == '==' else value
+            if field == 'employee_id':
+                ids = [v for v in values if v in manager.employees]
+            else:
+                index = manager.by_name if field == 'name' else manager.by_department
+                ids = chain.from_iterable(index.get(v, ()) for v in values)
+            return map(manager.employees.__getitem__, ids)
+    return iter(manager.employees.values())
+
+
+def _grouped(manager, conditions, order_by, descending, limit, group_by, agg):
+    for function, _ in agg.values():
+        if function not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {function}")
+    groups = None
+    if not conditions and group_by in ((), ('department',)):
+        groups = _from_running_stats(manager, group_by, agg)
+    if groups is None:
+        rows = _candidates(manager, conditions)
+        aggregate, finish = compile_aggregate(shape_of(conditions), group_by,
+                                              tuple((name, tuple(spec)) for name, spec in agg.items()))
+        groups = ((key, finish(s)) for key, s in aggregate(rows, *values_of(conditions)).items())
+    if group_by == ():
+        groups = ((None, results) for _, results in groups)
+    #groups come in key order unless order_by names one of the aggregates, ties stay in key order
+    if isinstance(order_by, str) and order_by in agg:
+        ordered = sorted(groups, key=lambda group: group[0])
+        ordered.sort(key=lambda group: group[1][order_by], reverse=descending)
+    else:
+        ordered = sorted(groups, key=lambda group: group[0], reverse=descending)
+    return islice(ordered, limit) if limit is not None else iter(ordered)
+
+
+def _from_running_stats(manager, group_by, agg):
+    #count, sum, avg, min and max of salary are already kept per department and overall
+    if any(function != 'count' and field != 'salary' for function, field in agg.values()):
+        return None
+    if group_by:
+        stats_of = manager.department_stats.items()
+    else:
+        stats_of = [((), manager.salary_stats)] if manager.salary_stats.count else []
+    groups = []
+    for key, stats in stats_of:
+        values = {'count': stats.count, 'sum': stats.total, 'avg': stats.average(),
+                  'min': stats.minimum(), 'max': stats.maximum()}
+        groups.append((key, {name: values[function] for name, (function, _) in agg.items()}))
+    return groups
+
+
+def _check_field(field):
+    if field not in FIELDS:
+        raise ValueError(f"Unknown field: {field}")
+
+
+def _as_tuple(fields):
+    if fields is None:
+        return ()
+    return (fields,) if isinstance(fields, str) else tuple(fields)
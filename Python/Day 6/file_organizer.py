@@ -1,8 +1,15 @@
 # A program that organizes files in a given directory
 
+import errno
+import hashlib
+import json
 import os
+import select
 import shutil
+import threading
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 class FileOrganizer:
     def __init__(self, folder_path):
@@ -16,55 +23,312 @@ class FileOrganizer:
             'Videos': ['.mp4', '.avi', '.mkv', '.mov'],
             'Others': []
         }
+        self.build_extension_map()
+
+        #moves running at once; on network or slow disks each one mostly waits on latency
+        self.workers = 8
+        #most moves handed to a worker at a time, so a huge plan does not turn into a future per file
+        self.batch_size = 256
+
+        #duplicate detection: copies are moved here instead of to their category in quarantine mode
+        self.duplicates_folder = 'Duplicates'
+        #content hashes kept between runs, keyed by (device, inode, size, mtime) so a file that
+        #has not changed, even if it was moved since, is never read again
+        self.hash_cache_name = '.file_organizer_hashes.json'
+        self.hash_chunk_size = 1024 * 1024
 
         #tracking the moved files
         self.moved_files = defaultdict(int)
         self.skipped_files = 0
+        self.duplicate_files = 0
+        #moves finish on worker threads, the counters are only touched under this lock
+        self.stats_lock = threading.Lock()
+        
+    def organize_files(self, dry_run=False, dedup=None):
+        #two phases: work out every move first, then carry them out on a thread pool
+        #a dry run only prints the plan; returns the plan either way
+        #dedup='report' leaves copies of files that are already there where they are and lists them,
+        #dedup='quarantine' moves them to the duplicates folder instead of their category
+        plan = self.plan_moves()
+        if plan is None:
+            return None
         
-    def organize_files(self):
+        if dedup:
+            duplicates = self.find_duplicates(plan)
+            self.duplicate_files = len(duplicates)
+            print(f"\nDuplicates Found: {len(duplicates)}")
+            for duplicate, original in duplicates.items():
+                print(f"{duplicate} is a copy of {original}")
+            if dedup == 'quarantine':
+                quarantine = os.path.join(self.folder_path, self.duplicates_folder)
+                plan = [(file_path, quarantine, file_name) if file_path in duplicates else (file_path, target_folder, file_name)
+                        for file_path, target_folder, file_name in plan]
+            else:
+                plan = [move for move in plan if move[0] not in duplicates]
+        
+        if dry_run:
+            self.print_plan(plan)
+        else:
+            self.execute_plan(plan)
+            self.print_summary()
+        return plan
+    
+    def plan_moves(self):
+        #[(file_path, target_folder, file_name)] for every file that has somewhere to go, nothing is touched
         
         #Ensure if the folder exists
         if not os.path.exists(self.folder_path):
             print(f"Error: The folder {self.folder_path} does not exist. ")
-            return
+            return None
         
+        plan = []
         #Iterate over all the files in the directory
-        for file_name in os.listdir(self.folder_path):
+        #scandir hands back the file type from the directory listing itself, no extra stat per entry
+        with os.scandir(self.folder_path) as entries:
+            for entry in entries:
+                #Skip if its a directory
+                if entry.is_dir():
+                    continue
+                
+                move = self._planned_move(entry.path, entry.name)
+                if move:
+                    plan.append(move)
+        return plan
+    
+    def _planned_move(self, file_path, file_name):
+        #the hash cache of an earlier run stays where it is
+        if file_name in (self.hash_cache_name, self.hash_cache_name + '.tmp'):
+            return None
+        file_ext = os.path.splitext(file_name)[1].lower()
+        folder_name = self.get_folder_name(file_ext)
+        if not folder_name:
+            return None
+        return file_path, os.path.join(self.folder_path, folder_name), file_name
+    
+    def watch(self, debounce=1.0, stop_event=None, idle_timeout=60.0):
+        #organizes the folder once, then keeps organizing new files as they arrive until interrupted
+        #(or until stop_event is set); after the first pass only the files named by inotify events are
+        #looked at, the folder is never listed again
+        #a new file is moved once nobody has it open any more and it has been left alone for debounce seconds;
+        #one that still looks open is moved anyway after idle_timeout seconds without any event, in case
+        #its close was lost (an overflowing event queue, or a process that had it open before it was watched)
+        from file_watcher import (IN_CLOSE_NOWRITE, IN_CLOSE_WRITE, IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_ISDIR,
+                                  IN_MODIFY, IN_MOVE_SELF, IN_MOVED_FROM, IN_MOVED_TO, IN_OPEN, IN_Q_OVERFLOW, Inotify)
+        
+        if not os.path.exists(self.folder_path):
+            print(f"Error: The folder {self.folder_path} does not exist. ")
+            return
+        try:
+            inotify = Inotify()
+            #watching starts before the first pass, so nothing that arrives during it is missed
+            inotify.add_watch(self.folder_path, IN_CREATE | IN_OPEN | IN_MODIFY | IN_CLOSE_WRITE | IN_CLOSE_NOWRITE
+                              | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+        except OSError as e:
+            print(f"Error: cannot watch {self.folder_path}: {e}")
+            return
+        
+        self.organize_files()
+        print(f"\nWatching {self.folder_path} for new files, press Ctrl+C to stop.")
+        #file name -> [time of its last event, how many times it is open]; every open is matched by a close,
+        #read-only or not, so a hard link or symlink that is never opened, or only read, gets back to 0
+        pending = {}
+        try:
+            while not (stop_event and stop_event.is_set()):
+                #sleep until the next file is due, but wake up now and then to notice stop_event
+                due_times = [seen + (idle_timeout if opened else debounce) for seen, opened in pending.values()]
+                timeout = max(0, min(due_times) - time.monotonic()) if due_times else 0.5
+                select.select([inotify], [], [], min(timeout, 0.5))
+                
+                now = time.monotonic()
+                for _, mask, _, name in inotify.read_events():
+                    if mask & IN_Q_OVERFLOW:
+                        print("Warning: too many events at once, some new files may not have been organized.")
+                    elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                        print(f"Error: The folder {self.folder_path} was removed or moved.")
+                        return
+                    elif mask & IN_ISDIR or not name:
+                        continue
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        pending.pop(name, None)
+                    elif mask & (IN_CREATE | IN_MOVED_TO):
+                        pending[name] = [now, 0]
+                    elif name in pending:
+                        entry = pending[name]
+                        entry[0] = now
+                        if mask & IN_OPEN:
+                            entry[1] += 1
+                        elif mask & (IN_CLOSE_WRITE | IN_CLOSE_NOWRITE):
+                            entry[1] = max(0, entry[1] - 1)
+                    elif mask & IN_MODIFY:
+                        #written through a descriptor opened before the file was being tracked
+                        pending[name] = [now, 1]
+                    elif mask & IN_CLOSE_WRITE:
+                        pending[name] = [now, 0]
+                
+                due = [name for name, (seen, opened) in pending.items()
+                       if now - seen >= (idle_timeout if opened else debounce)]
+                if due:
+                    for name in due:
+                        del pending[name]
+                    self._organize_new_files(due)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            inotify.close()
+            self.print_summary()
+    
+    def _organize_new_files(self, file_names):
+        plan = []
+        for file_name in file_names:
             file_path = os.path.join(self.folder_path, file_name)
-            
-            #Skip if its a directory
-            if os.path.isdir(file_path):
+            #it may have gone again, or turned out to be a directory
+            if not os.path.lexists(file_path) or os.path.isdir(file_path):
                 continue
-            
-            file_ext = os.path.splitext(file_name)[1].lower()
-            folder_name = self.get_folder_name(file_ext)
-            
-            #Creating the folder if it doesn't exist
-            if folder_name:
-                target_folder = os.path.join(self.folder_path, folder_name)
-                os.makedirs(target_folder, exist_ok=True)
-                
-                #Moving the files to the folder
-                self.move_file(file_path, target_folder, file_name)
+            move = self._planned_move(file_path, file_name)
+            if move:
+                plan.append(move)
+        for file_path, target_folder, file_name in plan:
+            print(f"New file: {file_name} -> {target_folder}")
+        if plan:
+            self.execute_plan(plan)
+    
+    def execute_plan(self, plan):
+        #Creating the folders if they don't exist, once per folder and before any move needs them
+        for target_folder in {target_folder for _, target_folder, _ in plan}:
+            os.makedirs(target_folder, exist_ok=True)
         
-        self.print_summary()
+        #Moving the files to the folders
+        #small plans are cut finer so every worker still gets a share
+        batch_size = max(1, min(self.batch_size, len(plan) // (self.workers * 4)))
+        batches = [plan[i:i + batch_size] for i in range(0, len(plan), batch_size)]
+        with ThreadPoolExecutor(self.workers) as pool:
+            for _ in pool.map(self._move_batch, batches):
+                pass
     
-    def get_folder_name(self, file_ext):
+    def find_duplicates(self, plan):
+        #{file path: path of the file it is a copy of} for the planned files whose content is already
+        #present, either in the category folders or in an older planned file
+        #files are only hashed if another file has exactly the same size
+        planned = {file_path for file_path, _, _ in plan}
+        #already organized files come first, so they are always the ones kept
+        candidates = []
+        for folder in self.extensions_mapping:
+            try:
+                with os.scandir(os.path.join(self.folder_path, folder)) as entries:
+                    candidates.extend(entry.path for entry in entries if entry.is_file())
+            except FileNotFoundError:
+                pass
+        candidates.extend(file_path for file_path, _, _ in plan)
+        
+        stats = {}
+        for file_path in candidates:
+            try:
+                stats[file_path] = os.stat(file_path)
+            except OSError:
+                pass
+        by_size = defaultdict(list)
+        for file_path, stat in stats.items():
+            by_size[stat.st_size].append(file_path)
+        to_hash = [file_path for paths in by_size.values()
+                   if len(paths) > 1 and any(path in planned for path in paths) for file_path in paths]
+        
+        cache = self._load_hash_cache()
+        keys = {file_path: self._hash_key(stats[file_path]) for file_path in to_hash}
+        missing = [file_path for file_path in to_hash if keys[file_path] not in cache]
+        with ThreadPoolExecutor(self.workers) as pool:
+            for file_path, digest in zip(missing, pool.map(self.hash_file, missing)):
+                if digest is not None:
+                    cache[keys[file_path]] = digest
+        #only files seen in this run stay in the cache, so it never outgrows the folder
+        self._save_hash_cache({keys[file_path]: cache[keys[file_path]] for file_path in to_hash if keys[file_path] in cache})
+        
+        originals = {}
+        duplicates = {}
+        #within one size, the organized files first and then the oldest planned file are kept
+        for file_path in sorted((path for path in to_hash if keys[path] in cache),
+                                key=lambda path: (path in planned, stats[path].st_mtime_ns, path)):
+            digest = cache[keys[file_path]]
+            original = originals.setdefault((stats[file_path].st_size, digest), file_path)
+            if original != file_path and file_path in planned:
+                duplicates[file_path] = original
+        return duplicates
+    
+    def hash_file(self, file_path):
+        #sha256 of the file read in fixed-size chunks, hashlib releases the GIL so threads hash in parallel
+        digest = hashlib.sha256()
+        try:
+            with open(file_path, 'rb') as f:
+                while True:
+                    chunk = f.read(self.hash_chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+        except OSError as e:
+            print(f"Error reading file {file_path}: {e}")
+            return None
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _hash_key(stat):
+        return f"{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+    
+    def _load_hash_cache(self):
+        try:
+            with open(os.path.join(self.folder_path, self.hash_cache_name), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_hash_cache(self, cache):
+        #write next to the old cache and swap it in, so a crash never leaves half a file
+        cache_path = os.path.join(self.folder_path, self.hash_cache_name)
+        with open(cache_path + '.tmp', 'w') as f:
+            json.dump(cache, f)
+        os.replace(cache_path + '.tmp', cache_path)
+    
+    def print_plan(self, plan):
+        planned = defaultdict(int)
+        for file_path, target_folder, file_name in plan:
+            print(f"{file_path} -> {os.path.join(target_folder, file_name)}")
+            planned[target_folder] += 1
+        
+        print("\nFiles to Move (dry run):")
+        for folder, count in planned.items():
+            print(f"{folder}: {count} files")
+    
+    def build_extension_map(self):
+        #extension -> folder, the first folder listing an extension keeps it
+        #call again after changing extensions_mapping
+        self.extension_folders = {}
         for folder, extensions in self.extensions_mapping.items():
-            if file_ext in extensions:
-                return folder
-            
+            for extension in extensions:
+                self.extension_folders.setdefault(extension, folder)
+    
+    def get_folder_name(self, file_ext):
         #if no matching folders put it in "Others"
-        return "Others" if file_ext else None
+        return self.extension_folders.get(file_ext, "Others" if file_ext else None)
     
     def move_file(self, file_path, target_folder, file_name):
         try:
-            shutil.move(file_path, os.path.join(target_folder, file_name))
-            self.moved_files[target_folder] += 1
+            #a rename within one filesystem is a single metadata update
+            try:
+                os.rename(file_path, os.path.join(target_folder, file_name))
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                #the target is on another device, only then copy the data over
+                shutil.move(file_path, os.path.join(target_folder, file_name))
+            with self.stats_lock:
+                self.moved_files[target_folder] += 1
             
-        except shutil.Error as e:
+        except (OSError, shutil.Error) as e:
             print(f"Error moving file {file_name}: {e}")
-            self.skipped_files += 1
+            with self.stats_lock:
+                self.skipped_files += 1
+    
+    def _move_batch(self, moves):
+        for file_path, target_folder, file_name in moves:
+            self.move_file(file_path, target_folder, file_name)
             
     def print_summary(self):
         print("\nFiles Moved:")
@@ -73,11 +337,20 @@ class FileOrganizer:
         
         if self.skipped_files:
             print(f"\nFiles Skipped: {self.skipped_files}")
+        
+        if self.duplicate_files:
+            print(f"\nDuplicates: {self.duplicate_files}")
             
 def main():
     folder_path = input("Enter the directory path to organize: ").strip()
+    if input("Keep watching for new files after organizing? (y/n): ").strip().lower() == 'y':
+        FileOrganizer(folder_path).watch()
+        return
+    dry_run = input("Dry run, only show what would be moved? (y/n): ").strip().lower() == 'y'
+    dedup = input("Duplicates: r to report, q to quarantine, or press Enter to move them as usual: ").strip().lower()
+    dedup = {'r': 'report', 'q': 'quarantine'}.get(dedup)
     organizer = FileOrganizer(folder_path)
-    organizer.organize_files()
+    organizer.organize_files(dry_run, dedup)
     
 if __name__ == "__main__":
     main()
\ No newline at end of file